@@ -0,0 +1,107 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+ANSWER_CACHE_MAX_ENTRIES = 256
+ANSWER_CACHE_TTL_SECONDS = 5 * 60
+
+# ===============================
+# TTL + LRU cache
+# ===============================
+class TTLLRUCache:
+    """Thread-safe bounded cache: entries expire after ttl and the least recently used go first."""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+# ===============================
+# Corpus versions
+# ===============================
+# Bumped whenever documents are inserted/changed/removed. A cached answer
+# remembers the version it was built from, so new data invalidates it
+# without any explicit purge.
+_versions = {}
+_global_version = 0
+_versions_lock = threading.Lock()
+
+def bump_corpus_version(symbols=None):
+    global _global_version
+    with _versions_lock:
+        _global_version += 1
+        for symbol in symbols or []:
+            if symbol:
+                key = symbol.upper()
+                _versions[key] = _versions.get(key, 0) + 1
+
+def get_corpus_version(symbol=None):
+    with _versions_lock:
+        if symbol:
+            return _versions.get(symbol.upper(), 0)
+        return _global_version
+
+# ===============================
+# Answer cache
+# ===============================
+answer_cache = TTLLRUCache(ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS)
+
+def normalize_question(question: str) -> str:
+    q = question.lower().strip()
+    q = re.sub(r"\s+", " ", q)
+    return q.rstrip("?!. ")
+
+def make_answer_key(question, ticker=None, hours_lookback=48, n_results=5, asset_type=None, market=None):
+    ticker = ticker.upper() if ticker else ""
+    return (
+        normalize_question(question),
+        ticker,
+        hours_lookback,
+        n_results,
+        asset_type or "",
+        (market or "").upper(),
+        get_corpus_version(ticker or None)
+    )
@@ -1,16 +1,28 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List
+import asyncio
 import json
-import os
+import threading
 from dotenv import load_dotenv
 load_dotenv()
 
 from ingest_all import ingest_all
-from query import answer_user_query_json
-from vector_store import delete_news_for_ticker
-from ingestion.stock_details import fetch_stock_details
+from query import answer_user_query_json_async, astream_user_query_json
+from vector_store import delete_news_for_ticker, get_collection, get_store_stats
+from ingestion.stock_details import get_stock_details, quote_service
+from refresh_scheduler import RefreshScheduler
+from backfill_worker import BackfillWorker
+from answer_cache import answer_cache
+from expansion_cache import get_expansion_cache
+from bm25_index import get_bm25_index
+from near_duplicates import get_fingerprint_index
+from symbol_index import get_symbol_index
+from ingestion.seen_ledger import get_seen_ledger
+from watchlist import load_watchlist, save_watchlist
+from retention import RetentionJob
 # from llm_backfill import backfill_llm_summaries # Imported dynamically where needed
 
 
@@ -33,6 +45,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# -----------------------
+# Startup
+# -----------------------
+@app.on_event("startup")
+def warm_vector_store():
+    # Load the embedding model and open the DB once, before the first request
+    get_collection()
+
+@app.on_event("startup")
+def start_refresh_scheduler():
+    refresh_scheduler.start()
+    refresh_scheduler.request_refresh(load_watchlist())
+
+@app.on_event("shutdown")
+def stop_refresh_scheduler():
+    refresh_scheduler.stop()
+
+@app.on_event("startup")
+def start_backfill_worker():
+    backfill_worker.start()
+
+@app.on_event("shutdown")
+def stop_backfill_worker():
+    backfill_worker.stop()
+
+@app.on_event("startup")
+def verify_symbol_index():
+    # One-off build for stores that predate the index, off the startup path
+    threading.Thread(
+        target=lambda: get_symbol_index().ensure_verified(get_collection()),
+        name="symbol-index-check",
+        daemon=True
+    ).start()
+
+@app.on_event("startup")
+def start_retention_job():
+    retention_job.start()
+
+@app.on_event("shutdown")
+def stop_retention_job():
+    retention_job.stop()
+
 # -----------------------
 # Models
 # -----------------------
@@ -40,14 +94,18 @@ class QueryRequest(BaseModel):
     question: str
     ticker: str = None  # Optional ticker for context injection
     hours_lookback: int = 120  # Default to 5 days matching backend capability
+    asset_type: str = None  # Optional filters: equity / commodity / forex / index
+    market: str = None      # IN / GLOBAL
 
 class Evidence(BaseModel):
     summary: str
     source_url: str
+    source_urls: List[str] = []  # every copy of the story, near-duplicates included
 
 class NewsItem(BaseModel):
     title: str
     url: str
+    urls: List[str] = []
     timestamp: str
     source: str
 
@@ -64,75 +122,144 @@ class IngestRequest(BaseModel):
 class WatchlistRequest(BaseModel):
     ticker: str
 
-# -----------------------
-# Persistent Watchlist
-# -----------------------
-WATCHLIST_FILE = "watchlist.json"
-DEFAULT_WATCHLIST = ["ITC", "AAPL", "GOOGL","RELIANCE"]
-
-def load_watchlist():
-    if not os.path.exists(WATCHLIST_FILE):
-        save_watchlist(DEFAULT_WATCHLIST)
-        return DEFAULT_WATCHLIST
-    try:
-        with open(WATCHLIST_FILE, "r") as f:
-            return json.load(f)
-    except:
-        return DEFAULT_WATCHLIST
-
-def save_watchlist(watchlist):
-    with open(WATCHLIST_FILE, "w") as f:
-        json.dump(watchlist, f)
+class RetentionRequest(BaseModel):
+    dry_run: bool = False
+    archive: bool = True
 
 # -----------------------
 # Background Tasks
 # -----------------------
-def ingest_all_watchlist(watchlist: List[str]):
-    print("🚀 Triggering background ingestion for watchlist...")
-    for ticker in watchlist:
-        try:
-            ingest_all(ticker)
-        except Exception as e:
-            print(f"⚠️ Failed to ingest {ticker}: {e}")
-    print("✅ Background ingestion complete.")
+# Watchlist refreshes go through the scheduler: it skips tickers that are
+# still fresh and collapses duplicate triggers from multiple tabs/users.
+# needs_llm docs are summarized continuously, watchlisted tickers first.
+backfill_worker = BackfillWorker(watchlist_fn=lambda: load_watchlist())
 
-def ingest_single_ticker(ticker: str):
-    try:
-        ingest_all(ticker)
-    except Exception as e:
-        print(f"⚠️ Failed to ingest {ticker}: {e}")
+def ingest_and_backfill(ticker: str):
+    ingest_all(ticker)
+    backfill_worker.nudge()
+
+refresh_scheduler = RefreshScheduler(
+    ingest_fn=ingest_and_backfill,
+    watchlist_fn=lambda: load_watchlist()
+)
+
+# Expired documents are archived and deleted on a schedule
+retention_job = RetentionJob()
 
 def remove_single_ticker_data(ticker: str):
     try:
+        # Waits out an in-flight ingest of the ticker before deleting
+        refresh_scheduler.forget(ticker)
         delete_news_for_ticker(ticker)
     except Exception as e:
         print(f"⚠️ Failed to remove data for {ticker}: {e}")
 
 @app.post("/api/query", response_model=StockResponse)
-def query_from_search(req: QueryRequest):
+async def query_from_search(req: QueryRequest):
     try:
-        return answer_user_query_json(
+        return await answer_user_query_json_async(
             query=req.question,
             hours_lookback=req.hours_lookback,
             n_results=5,
-            ticker=req.ticker
+            ticker=req.ticker,
+            asset_type=req.asset_type,
+            market=req.market
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/query/stream")
+async def query_from_search_stream(req: QueryRequest):
+    """
+    Server-Sent Events version of /api/query: a `meta` event with
+    sentiment/confidence/evidence/news as soon as retrieval finishes, then
+    `token` events with the answer text, then `done` with the full result.
+    """
+    async def events():
+        try:
+            async for event, data in astream_user_query_json(
+                query=req.question,
+                hours_lookback=req.hours_lookback,
+                n_results=5,
+                ticker=req.ticker,
+                asset_type=req.asset_type,
+                market=req.market
+            ):
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/health")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/api/store/stats")
+def store_stats():
+    stats = get_store_stats()
+    stats["bm25"] = get_bm25_index().stats()
+    stats["fingerprints"] = get_fingerprint_index().stats()
+    stats["symbols"] = get_symbol_index().stats()
+    stats["seen_ledger"] = get_seen_ledger().stats()
+    return stats
+
+@app.get("/api/store/counts")
+def store_counts(tickers: str = None):
+    # Comma-separated tickers; defaults to the watchlist
+    symbols = [t.strip().upper() for t in tickers.split(",") if t.strip()] if tickers else load_watchlist()
+    counts = get_symbol_index().counts(symbols)
+    return {symbol: counts.get(symbol, {"total": 0}) for symbol in symbols}
+
+@app.post("/api/admin/symbol-index/check")
+def check_symbol_index(repair: bool = True):
+    return get_symbol_index().check(get_collection(), repair=repair)
+
+@app.get("/api/admin/retention")
+def get_retention_status():
+    return retention_job.status()
+
+@app.post("/api/admin/retention")
+def run_retention_now(req: RetentionRequest):
+    try:
+        return retention_job.run_now(dry_run=req.dry_run, archive=req.archive)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    return {
+        "answers": answer_cache.stats(),
+        "expansions": get_expansion_cache().stats(),
+        "quotes": quote_service.stats()
+    }
+
 @app.get("/api/watchlist")
 def get_watchlist(background_tasks: BackgroundTasks):
     current_list = load_watchlist()
-    # Trigger ingestion for all stocks in the background when dashboard loads
-    background_tasks.add_task(ingest_all_watchlist, current_list)
+    # Refresh only the stale stocks in the background when dashboard loads
+    refresh_scheduler.request_refresh(current_list)
+    # Warm the quote cache for every card with one bulk download
+    background_tasks.add_task(quote_service.refresh_many, current_list)
     return current_list
 
+@app.get("/api/watchlist/schedule")
+def get_refresh_schedule():
+    return refresh_scheduler.schedule(load_watchlist())
+
+@app.get("/api/backfill/status")
+def get_backfill_status():
+    return backfill_worker.status()
+
 @app.post("/api/watchlist/add")
-def add_to_watchlist(req: WatchlistRequest, background_tasks: BackgroundTasks):
+def add_to_watchlist(req: WatchlistRequest):
     current_list = load_watchlist()
     ticker = req.ticker.upper()
     
@@ -140,7 +267,7 @@ def add_to_watchlist(req: WatchlistRequest, background_tasks: BackgroundTasks):
         current_list.append(ticker)
         save_watchlist(current_list)
         # Trigger ingestion for the new stock
-        background_tasks.add_task(ingest_single_ticker, ticker)
+        refresh_scheduler.request_refresh([ticker], force=True)
         
     return current_list
 
@@ -160,15 +287,17 @@ def remove_from_watchlist(req: WatchlistRequest, background_tasks: BackgroundTas
 @app.post("/api/ingest")
 def ingest_stock_news(req: IngestRequest):
     try:
-        ingest_all(req.ticker.upper())
+        # Through the scheduler: records last_ingest, nudges the backfill
+        # worker and lets forget() wait for this run
+        refresh_scheduler.refresh_now(req.ticker.upper())
         return {"status": "success", "ticker": req.ticker.upper()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/stocks/{ticker}", response_model=StockResponse)
-def get_stock_info(ticker: str):
+async def get_stock_info(ticker: str):
     try:
-        result = answer_user_query_json(
+        result = await answer_user_query_json_async(
             query=f"how does {ticker.upper()} perform",
             hours_lookback=48,
             n_results=5,
@@ -179,9 +308,9 @@ def get_stock_info(ticker: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/stocks/{ticker}/details")
-def get_stock_details_endpoint(ticker: str):
+async def get_stock_details_endpoint(ticker: str):
     try:
-        data = fetch_stock_details(ticker)
+        data = await asyncio.to_thread(get_stock_details, ticker)
         if not data:
              raise HTTPException(status_code=404, detail="Stock details not found")
         return data
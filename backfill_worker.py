@@ -0,0 +1,331 @@
+import heapq
+import random
+import threading
+import time
+from collections import deque
+
+from vector_store import get_collection
+from llm_backfill import (
+    BACKFILL_BATCH_SIZE,
+    build_backfill_item,
+    store_backfilled_summaries,
+    summarize_items
+)
+
+BACKFILL_CONCURRENCY = 2
+LLM_REQUESTS_PER_MINUTE = 30   # provider rate limit we stay under
+LLM_BURST = 5
+MAX_RETRIES = 4
+RETRY_BASE_SECONDS = 2
+MAX_ATTEMPTS_PER_DOC = 3       # then the doc is parked until restart
+POLL_INTERVAL_SECONDS = 30
+REFILL_LIMIT = 500             # needs_llm docs pulled per queue refill
+REFILL_PAGE_SIZE = 200
+REFILL_RECENT_HOURS = 120      # newest docs are what queries look at
+STORED_MEMORY_SECONDS = 600    # how long just-stored ids are kept out of refills
+DRAIN_WINDOW_SECONDS = 300
+
+# ===============================
+# Rate limiting
+# ===============================
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable(error):
+    """True for rate limits (429), server errors (5xx), timeouts and dropped connections."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    name = type(error).__name__
+    return any(part in name for part in ("Timeout", "Connection", "RateLimit"))
+
+
+class RetryCounter:
+    """Thread-safe count of LLM retries, shared by every view of one RateLimitedLLM."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, n=1):
+        with self._lock:
+            self.value += n
+
+
+class RateLimitedLLM:
+    """
+    Wraps an LLM so every invoke() waits for a rate-limit token and is
+    retried with exponential backoff + jitter on transient errors (429s,
+    5xx, timeouts). Anything else (bad request, validation) raises at once.
+    """
+
+    def __init__(self, llm, bucket, max_retries=MAX_RETRIES, base_delay=RETRY_BASE_SECONDS, counter=None):
+        self.llm = llm
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.counter = counter or RetryCounter()
+
+    @property
+    def retries(self):
+        return self.counter.value
+
+    def invoke(self, prompt):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return self.llm.invoke(prompt)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                self.counter.add()
+                delay = self.base_delay * (2 ** attempt) + random.uniform(0, 1)
+                print(f"⚠️ LLM call failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def without_retries(self):
+        """Same bucket and retry counter, single attempt."""
+        return RateLimitedLLM(self.llm, self.bucket, max_retries=0, counter=self.counter)
+
+# ===============================
+# Worker
+# ===============================
+def _default_llm():
+    from langchain_groq import ChatGroq
+    return ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
+
+
+class BackfillWorker:
+    """
+    Continuously drains `needs_llm` documents.
+
+    Priority: watchlisted symbols first, then newest timestamp first.
+    Batches are summarized by up to `concurrency` threads, all sharing one
+    token bucket so the provider rate limit holds across threads.
+    """
+
+    def __init__(
+        self,
+        watchlist_fn=None,
+        llm_factory=_default_llm,
+        concurrency=BACKFILL_CONCURRENCY,
+        batch_size=BACKFILL_BATCH_SIZE,
+        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        poll_interval=POLL_INTERVAL_SECONDS
+    ):
+        self.watchlist_fn = watchlist_fn
+        self.llm_factory = llm_factory
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.requests_per_minute = requests_per_minute
+        self.poll_interval = poll_interval
+        self.bucket = TokenBucket(requests_per_minute / 60.0, LLM_BURST)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._slots = threading.Semaphore(concurrency)
+        self._heap = []            # (priority, -timestamp, id, doc, meta)
+        self._known = set()        # ids queued or in flight
+        self._attempts = {}
+        self._stored_at = {}       # id -> monotonic time its summary was stored
+        self._in_flight = 0
+        self._llm = None
+        self._thread = None
+
+        self._drained = deque()    # (time, docs) for drain rate
+        self.stats_totals = {"summarized": 0, "failed": 0, "llm_calls": 0, "batches": 0}
+        self.last_error = None
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._dispatch_loop, name="backfill-dispatch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def nudge(self):
+        """Ask for an immediate refill (e.g. right after an ingest)."""
+        self._wakeup.set()
+
+    # ---------- queue ----------
+    def _refill_filters(self, watchlist):
+        # Most urgent first: watchlisted + recent, then recent, then the rest
+        needs_llm = {"summary_source": "needs_llm"}
+        recent = {"timestamp": {"$gte": time.time() - REFILL_RECENT_HOURS * 3600}}
+        filters = []
+        if watchlist:
+            filters.append({"$and": [needs_llm, {"symbol": {"$in": sorted(watchlist)}}, recent]})
+        filters.append({"$and": [needs_llm, recent]})
+        filters.append(needs_llm)
+        return filters
+
+    def _refill(self):
+        watchlist = set(self.watchlist_fn()) if self.watchlist_fn else set()
+        collection = get_collection()
+        candidates = {}
+
+        # Page past parked and already-queued docs until REFILL_LIMIT new ones are found
+        for where in self._refill_filters(watchlist):
+            offset = 0
+            while len(candidates) < REFILL_LIMIT:
+                page = collection.get(where=where, limit=REFILL_PAGE_SIZE, offset=offset)
+                if not page["ids"]:
+                    break
+                offset += len(page["ids"])
+                with self._lock:
+                    for doc_id, doc, meta in zip(page["ids"], page["documents"], page["metadatas"]):
+                        if (
+                            doc_id in candidates
+                            or doc_id in self._known
+                            or self._attempts.get(doc_id, 0) >= MAX_ATTEMPTS_PER_DOC
+                        ):
+                            continue
+                        candidates[doc_id] = (doc, meta)
+            if len(candidates) >= REFILL_LIMIT:
+                break
+
+        added = 0
+        now = time.monotonic()
+        with self._lock:
+            for doc_id, stored_at in list(self._stored_at.items()):
+                if now - stored_at > STORED_MEMORY_SECONDS:
+                    del self._stored_at[doc_id]
+            for doc_id, (doc, meta) in list(candidates.items())[:REFILL_LIMIT]:
+                # Re-checked under the lock: a batch may have stored this doc
+                # (or queued it) while the pages above were being read
+                if doc_id in self._known or doc_id in self._stored_at:
+                    continue
+                symbol = meta.get("symbol", meta.get("ticker", ""))
+                priority = 0 if symbol in watchlist else 1
+                heapq.heappush(self._heap, (priority, -float(meta.get("timestamp", 0)), doc_id, doc, meta))
+                self._known.add(doc_id)
+                added += 1
+        return added
+
+    def _next_batch(self):
+        with self._lock:
+            batch = []
+            while self._heap and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(self._heap))
+            return batch
+
+    # ---------- processing ----------
+    def _dispatch_loop(self):
+        while not self._stopping.is_set():
+            # Take a worker slot before popping, so the batch reflects the
+            # latest priorities when a slot frees up
+            self._slots.acquire()
+            batch = self._next_batch()
+            if not batch:
+                self._slots.release()
+                try:
+                    added = self._refill()
+                except Exception as e:
+                    self.last_error = str(e)
+                    added = 0
+                if not added:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                continue
+
+            with self._lock:
+                self._in_flight += len(batch)
+            threading.Thread(target=self._process, args=(batch,), daemon=True).start()
+
+    def _process(self, batch):
+        try:
+            with self._lock:
+                if self._llm is None:
+                    self._llm = RateLimitedLLM(self.llm_factory(), self.bucket)
+
+            items, by_id = [], {}
+            for _, _, doc_id, doc, meta in batch:
+                item = build_backfill_item(doc_id, doc, meta)
+                items.append(item)
+                by_id[doc_id] = (item["title"], meta)
+
+            # A failed batch falls back to (retried) single calls, so the batch itself isn't retried
+            summaries, llm_calls = summarize_items(
+                self._llm, items, batch_size=self.batch_size, batch_llm=self._llm.without_retries()
+            )
+            stored = store_backfilled_summaries(get_collection(), summaries, by_id)
+
+            with self._lock:
+                self.stats_totals["summarized"] += stored
+                self.stats_totals["failed"] += len(batch) - stored
+                self.stats_totals["llm_calls"] += llm_calls
+                self.stats_totals["batches"] += 1
+                self._drained.append((time.time(), stored))
+                stored_at = time.monotonic()
+                for doc_id in by_id:
+                    if doc_id in summaries:
+                        self._stored_at[doc_id] = stored_at
+                    else:
+                        self._attempts[doc_id] = self._attempts.get(doc_id, 0) + 1
+        except Exception as e:
+            print(f"⚠️ Backfill batch failed: {e}")
+            self.last_error = str(e)
+            with self._lock:
+                self.stats_totals["failed"] += len(batch)
+                for _, _, doc_id, _, _ in batch:
+                    self._attempts[doc_id] = self._attempts.get(doc_id, 0) + 1
+        finally:
+            with self._lock:
+                self._in_flight -= len(batch)
+                for _, _, doc_id, _, _ in batch:
+                    self._known.discard(doc_id)
+            self._slots.release()
+
+    # ---------- introspection ----------
+    def status(self):
+        now = time.time()
+        with self._lock:
+            while self._drained and now - self._drained[0][0] > DRAIN_WINDOW_SECONDS:
+                self._drained.popleft()
+            recent = sum(n for _, n in self._drained)
+            return {
+                "running": bool(self._thread and self._thread.is_alive()),
+                "queue_depth": len(self._heap),
+                "in_flight": self._in_flight,
+                "watchlist_queued": sum(1 for entry in self._heap if entry[0] == 0),
+                "drain_rate_per_minute": round(recent / (DRAIN_WINDOW_SECONDS / 60), 2),
+                "concurrency": self.concurrency,
+                "batch_size": self.batch_size,
+                "requests_per_minute": self.requests_per_minute,
+                "llm_retries": self._llm.retries if self._llm else 0,
+                "parked": sum(1 for n in self._attempts.values() if n >= MAX_ATTEMPTS_PER_DOC),
+                "totals": dict(self.stats_totals),
+                "last_error": self.last_error
+            }
@@ -0,0 +1,85 @@
+"""
+Microbenchmark: single-pass lexicon scan vs the old per-word str.count scoring.
+
+    python benchmarks/bench_lexicon.py
+
+The legacy functions below are the pre-lexicon.py implementations, kept here
+only for comparison. Scores can differ where the old substring counting hit
+inside other words ("may" in "mayor", "rose" in "prose"); those mismatches
+are listed.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexicon import (
+    HEDGING_WORDS,
+    NEGATIVE_PERFORMANCE_WORDS,
+    NEGATIVE_WEIGHTS,
+    POSITIVE_PERFORMANCE_WORDS,
+    POSITIVE_WEIGHTS,
+    SPECULATIVE_WORDS,
+    scan_text
+)
+
+SUMMARIES = [
+    "Apple shares rise after strong iPhone sales; analysts see growth as Morgan Stanley raises target.",
+    "Regulators could add scrutiny and concerns may weigh on the outlook for the year ahead.",
+    "ITC stock slides as cigarette volumes disappoint and margin pressure builds.",
+    "Alphabet falls after ad revenue declines; selloff deepens amid uncertainty.",
+    "Reliance gains as retail arm posts bullish quarter, optimism returns to energy unit.",
+    "The mayor said the prose was strong, possibly the best of the IPO season.",
+    "Nvidia surges, jumps to record after upgrades; potential weakness in China flagged.",
+    "Infosys rose 2% while peers fell, with jitters over US visa rules.",
+]
+
+# ===============================
+# Legacy scoring (str.count per word)
+# ===============================
+def legacy_sentiment(text):
+    text = text.lower()
+    score = 0
+    for w, wt in POSITIVE_WEIGHTS.items():
+        score += wt * text.count(w)
+    for w, wt in NEGATIVE_WEIGHTS.items():
+        score -= wt * text.count(w)
+    return score
+
+def legacy_hedging(text):
+    return sum(text.lower().count(w) for w in HEDGING_WORDS)
+
+def legacy_performance(text):
+    text = text.lower()
+    score = 0
+    for w in POSITIVE_PERFORMANCE_WORDS:
+        score += text.count(w)
+    for w in NEGATIVE_PERFORMANCE_WORDS:
+        score -= text.count(w)
+    for w in SPECULATIVE_WORDS:
+        score -= text.count(w)
+    return score
+
+def legacy_scan(text):
+    return {
+        "sentiment": legacy_sentiment(text),
+        "hedging": legacy_hedging(text),
+        "performance": legacy_performance(text)
+    }
+
+
+def main(number=20000):
+    for name, fn in (("legacy str.count", legacy_scan), ("lexicon single-pass", scan_text)):
+        seconds = timeit.timeit(lambda: [fn(s) for s in SUMMARIES], number=number)
+        per_doc = seconds / (number * len(SUMMARIES)) * 1e6
+        print(f"{name:<22} {per_doc:7.2f} µs/summary")
+
+    mismatches = [s for s in SUMMARIES if legacy_scan(s) != scan_text(s)]
+    print(f"\nAgreement: {len(SUMMARIES) - len(mismatches)}/{len(SUMMARIES)} summaries")
+    for s in mismatches:
+        print(f"  legacy {legacy_scan(s)} vs lexicon {scan_text(s)}: {s}")
+
+
+if __name__ == "__main__":
+    main()
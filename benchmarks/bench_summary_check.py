@@ -0,0 +1,111 @@
+"""
+Benchmark: needs_llm_summary with the screened similarity check vs the
+old always-SequenceMatcher version, on feed-shaped (title, summary) pairs.
+
+    python benchmarks/bench_summary_check.py
+
+Reports per-entry cost, how often difflib still runs, and decision
+agreement (expected to be exact: the screens are bounds, not estimates).
+"""
+import os
+import random
+import sys
+import timeit
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_summary_required
+from llm_summary_required import needs_llm_summary, needs_llm_summary_batch, normalize
+
+TITLES = [
+    "Apple shares rise after strong iPhone sales in China",
+    "ITC Q2 results: net profit rises 5% to Rs 5,000 crore",
+    "Reliance Jio tariff hike: what it means for subscribers",
+    "Gold price today: yellow metal slips as dollar firms",
+    "Alphabet slides after ad slowdown weighs on outlook",
+    "HDFC Bank shares gain after RBI nod for merger",
+    "Infosys wins $1.5 billion deal from European client",
+    "Tata Motors EV sales jump 40% in September",
+    "Sensex ends 300 points higher; Nifty above 25,000",
+    "Rupee falls to record low against US dollar",
+    "Nvidia surges to record as AI demand stays strong",
+    "Crude oil jumps 3% after OPEC+ output cut",
+]
+PUBLISHERS = ["Reuters", "Moneycontrol", "The Economic Times", "Business Standard", "CNBC TV18", "Mint"]
+SENTENCES = [
+    "Analysts expect the momentum to continue next quarter.",
+    "The stock has gained 12% this year.",
+    "Shares were trading higher in early deals.",
+    "The company said demand remained robust across regions, with margins expanding "
+    "on lower input costs and a better product mix in its core segments.",
+]
+
+
+def build_feed(seed=7):
+    """Google-News-like feed: mostly title+publisher copies, some real summaries."""
+    rng = random.Random(seed)
+    entries = []
+    for title in TITLES:
+        for publisher in PUBLISHERS:
+            entries.append((f"{title} - {publisher}", f"{title}  {publisher}"))
+            entries.append((title, f"{title} {publisher}"))
+        for sentence in SENTENCES:
+            entries.append((title, f"{title}. {sentence}"))
+            entries.append((title, f"{sentence} {sentence}"))
+        words = title.split()
+        rng.shuffle(words)
+        entries.append((title, " ".join(words) + " Reuters today"))
+        entries.append((title, title.split(":")[0]))
+        entries.append((title, ""))
+    return entries
+
+# ===============================
+# Legacy check (SequenceMatcher every time)
+# ===============================
+def legacy_needs_llm_summary(title, summary):
+    if not summary:
+        return True
+    title_n = normalize(title)
+    summary_n = normalize(summary).rsplit(" ", maxsplit=2)[0]
+    if SequenceMatcher(None, title_n, summary_n).ratio() > 0.85:
+        return True
+    return len(summary_n) < 40
+
+
+def main(number=50):
+    feed = build_feed()
+
+    legacy = timeit.timeit(lambda: [legacy_needs_llm_summary(t, s) for t, s in feed], number=number)
+    single = timeit.timeit(lambda: [needs_llm_summary(t, s) for t, s in feed], number=number)
+    batch = timeit.timeit(lambda: needs_llm_summary_batch(feed), number=number)
+    per_entry = lambda seconds: seconds / (number * len(feed)) * 1e6
+
+    print(f"{len(feed)} entries")
+    print(f"legacy SequenceMatcher   {per_entry(legacy):7.2f} µs/entry")
+    print(f"screened similarity      {per_entry(single):7.2f} µs/entry")
+    print(f"batch API                {per_entry(batch):7.2f} µs/entry")
+
+    # How often the exact difflib fallback is still needed
+    calls = {"n": 0}
+    original = llm_summary_required.similarity
+    def counting(a, b):
+        calls["n"] += 1
+        return original(a, b)
+    llm_summary_required.similarity = counting
+    try:
+        decisions = needs_llm_summary_batch(feed)
+    finally:
+        llm_summary_required.similarity = original
+    print(f"difflib fallbacks        {calls['n']}/{len(feed)}")
+
+    expected = [legacy_needs_llm_summary(t, s) for t, s in feed]
+    agree = sum(a == b for a, b in zip(expected, decisions))
+    print(f"\nAgreement: {agree}/{len(feed)} decisions")
+    for (title, summary), old, new in zip(feed, expected, decisions):
+        if old != new:
+            print(f"  legacy {old} vs new {new}: {title!r} / {summary!r}")
+
+
+if __name__ == "__main__":
+    main()
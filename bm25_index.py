@@ -0,0 +1,249 @@
+"""
+Lexical (BM25) inverted index over document titles and summaries.
+
+Dense MiniLM retrieval misses exact tickers and rare company names; this
+index catches them and is fused into RRF as one more ranked list. It lives
+in SQLite next to stock_news_db and is maintained incrementally by
+ingest_all, the LLM backfill and vector_store.delete_documents.
+
+    python bm25_index.py    # rebuild from the vector store
+"""
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from multiquery import ASSET_SCOPE_FILTERS, extract_summary
+
+BM25_INDEX_PATH = "./stock_news_bm25.sqlite3"
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
+    "in", "is", "it", "its", "of", "on", "or", "that", "the", "to", "was",
+    "were", "will", "with", "how", "what", "why", "does", "do", "did"
+}
+
+def tokenize(text: str):
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in STOPWORDS]
+
+def _indexed_text(doc: str, meta) -> str:
+    # Title + summary only; the "Stock:" header line would match every doc
+    title = (meta or {}).get("title", "")
+    return f"{title} {extract_summary(doc or '')}"
+
+
+class BM25Index:
+    def __init__(self, path=None):
+        self.path = path or BM25_INDEX_PATH
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS docs (
+                    doc_id TEXT PRIMARY KEY,
+                    symbol TEXT,
+                    asset_type TEXT,
+                    market TEXT,
+                    timestamp REAL,
+                    length INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (term, doc_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+                CREATE INDEX IF NOT EXISTS docs_symbol ON docs (symbol);
+                CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value REAL NOT NULL);
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ---------- maintenance ----------
+    @staticmethod
+    def _bump(conn, doc_delta, length_delta):
+        for name, delta in (("doc_count", doc_delta), ("total_length", length_delta)):
+            conn.execute(
+                "INSERT INTO meta (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta)
+            )
+
+    @classmethod
+    def _remove_ids(cls, conn, ids):
+        removed = 0
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            count, length = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs WHERE doc_id IN ({marks})", chunk
+            ).fetchone()
+            conn.execute(f"DELETE FROM postings WHERE doc_id IN ({marks})", chunk)
+            conn.execute(f"DELETE FROM docs WHERE doc_id IN ({marks})", chunk)
+            cls._bump(conn, -count, -length)
+            removed += count
+        return removed
+
+    def add_documents(self, ids, documents, metadatas):
+        """Indexes (or re-indexes) documents; same arguments as collection.upsert."""
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock, self._connect() as conn:
+            self._remove_ids(conn, ids)
+            total_length = 0
+            for doc_id, doc, meta in zip(ids, documents, metadatas):
+                meta = meta or {}
+                terms = Counter(tokenize(_indexed_text(doc, meta)))
+                length = sum(terms.values())
+                total_length += length
+                conn.execute(
+                    "INSERT INTO docs (doc_id, symbol, asset_type, market, timestamp, length) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        doc_id,
+                        meta.get("symbol", meta.get("ticker")),
+                        meta.get("asset_type"),
+                        meta.get("market"),
+                        float(meta.get("timestamp", 0) or 0),
+                        length
+                    )
+                )
+                conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, doc_id, tf) for term, tf in terms.items()]
+                )
+            self._bump(conn, len(ids), total_length)
+
+    def remove(self, ids):
+        ids = list(ids)
+        if not ids:
+            return 0
+        with self._lock, self._connect() as conn:
+            return self._remove_ids(conn, ids)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM docs")
+            conn.execute("DELETE FROM meta")
+
+    # ---------- search ----------
+    def search(self, query: str, n_results=10, since=None, scope=None):
+        """
+        Top doc ids by BM25 score, optionally only docs with timestamp >= since
+        and matching scope ({"symbols", "asset_type", "market"}).
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        filters = "d.timestamp >= ?"
+        filter_args = [since if since is not None else float("-inf")]
+        if scope:
+            symbols = list(scope.get("symbols") or [])
+            if symbols:
+                filters += f" AND d.symbol IN ({','.join('?' * len(symbols))})"
+                filter_args += symbols
+            for key in ("asset_type", "market"):
+                if ASSET_SCOPE_FILTERS and scope.get(key):
+                    filters += f" AND d.{key} = ?"
+                    filter_args.append(scope[key])
+
+        with self._lock, self._connect() as conn:
+            meta = dict(conn.execute("SELECT name, value FROM meta").fetchall())
+            doc_count = meta.get("doc_count", 0)
+            if doc_count <= 0:
+                return []
+            avg_length = meta.get("total_length", 0) / doc_count or 1.0
+
+            scores = Counter()
+            for term in terms:
+                (df,) = conn.execute("SELECT COUNT(*) FROM postings WHERE term = ?", (term,)).fetchone()
+                if not df:
+                    continue
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                rows = conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.doc_id = p.doc_id "
+                    f"WHERE p.term = ? AND {filters}",
+                    [term] + filter_args
+                ).fetchall()
+                for doc_id, tf, length in rows:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        return [doc_id for doc_id, _ in scores.most_common(n_results)]
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            meta = dict(conn.execute("SELECT name, value FROM meta").fetchall())
+            (terms,) = conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()
+        return {
+            "documents": int(meta.get("doc_count", 0)),
+            "terms": terms,
+            "path": self.path
+        }
+
+    def rebuild(self, collection, batch_size=500):
+        """Re-indexes every document in the collection."""
+        self.clear()
+        offset = 0
+        while True:
+            page = collection.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                break
+            self.add_documents(page["ids"], page["documents"], page["metadatas"])
+            offset += len(page["ids"])
+        return offset
+
+
+def retrieve_bm25_results(collection, query, hours_lookback, n_results, index=None, scope=None):
+    """
+    BM25 ranking for the query in the same shape as
+    retrieve_multi_query_results: ([docs], [metas]) for one ranked list.
+    """
+    cutoff = (datetime.now() - timedelta(hours=hours_lookback)).timestamp()
+    ids = (index or get_bm25_index()).search(query, n_results=n_results, since=cutoff, scope=scope)
+    if not ids:
+        return [[]], [[]]
+
+    found = collection.get(ids=ids, include=["documents", "metadatas"])
+    by_id = {
+        doc_id: (doc, meta)
+        for doc_id, doc, meta in zip(found["ids"], found["documents"], found["metadatas"])
+    }
+    # Keep BM25 order; skip ids the store no longer has
+    ranked = [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+    return [[d for d, _ in ranked]], [[m for _, m in ranked]]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_bm25_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = BM25Index()
+    return _index
+
+
+if __name__ == "__main__":
+    from vector_store import get_collection
+    count = get_bm25_index().rebuild(get_collection())
+    print(f"✅ BM25 index rebuilt: {count} documents")
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+EMBEDDING_CACHE_MAX_MB = 64
+DISK_CACHE_CAPACITY = 200_000   # vectors kept in the memory-mapped file
+
+# ===============================
+# Keys
+# ===============================
+_WHITESPACE = re.compile(r"\s+")
+
+def embedding_key(text: str, model_name: str) -> str:
+    normalized = _WHITESPACE.sub(" ", text).strip()
+    return hashlib.sha256(f"{model_name}\0{normalized}".encode()).hexdigest()
+
+# ===============================
+# Disk tier (memory-mapped vectors)
+# ===============================
+class MemmapEmbeddingStore:
+    """
+    Fixed-capacity ring buffer of float32 vectors in a memory-mapped file,
+    with a small SQLite index from key to slot. When full, the oldest slot
+    is overwritten.
+    """
+
+    def __init__(self, path_prefix, capacity=DISK_CACHE_CAPACITY):
+        self.vectors_path = f"{path_prefix}.f32"
+        self.index_path = f"{path_prefix}.idx.sqlite3"
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._vectors = None
+        self.dim = None
+
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS slots (key TEXT PRIMARY KEY, slot INTEGER UNIQUE)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+            row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        if row:
+            self._open(row[0])
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _open(self, dim):
+        mode = "r+" if os.path.exists(self.vectors_path) else "w+"
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(self.capacity, dim))
+        self.dim = dim
+
+    def get_many(self, keys):
+        if self._vectors is None or not keys:
+            return {}
+        found = {}
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, slot FROM slots WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, slot in rows:
+                    found[key] = np.array(self._vectors[slot])
+        return found
+
+    def put_many(self, items):
+        if not items:
+            return
+        with self._lock, self._connect() as conn:
+            if self._vectors is None:
+                dim = len(items[0][1])
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dim', ?)", (dim,))
+                self._open(dim)
+            row = conn.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()
+            next_slot = row[0] if row else 0
+            for key, vector in items:
+                slot = next_slot % self.capacity
+                next_slot += 1
+                conn.execute("DELETE FROM slots WHERE slot = ?", (slot,))
+                conn.execute("INSERT OR REPLACE INTO slots (key, slot) VALUES (?, ?)", (key, slot))
+                self._vectors[slot] = vector
+            conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('next_slot', ?)", (next_slot,))
+            self._vectors.flush()
+
+# ===============================
+# Memory tier + embedding function
+# ===============================
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Wraps a Chroma embedding function with a content-hash cache.
+
+    Lookups go memory LRU -> optional memmap disk store -> model; only the
+    misses are sent to the model, in one batch. Name and config are the
+    wrapped function's, so existing collections accept it unchanged.
+    """
+
+    def __init__(self, inner, model_name, max_mb=EMBEDDING_CACHE_MAX_MB, disk_path=None):
+        self._inner = inner
+        self.model_name = model_name
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._memory = OrderedDict()   # key -> np.ndarray
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._disk = MemmapEmbeddingStore(disk_path) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        keys = [embedding_key(t, self.model_name) for t in texts]
+        counts = Counter(keys)
+        vectors = {}
+
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    vectors[key] = vector
+            self.hits += sum(counts[k] for k in vectors)
+
+        missing = [k for k in counts if k not in vectors]
+        if missing and self._disk is not None:
+            from_disk = self._disk.get_many(missing)
+            self.disk_hits += sum(counts[k] for k in from_disk)
+            self._remember(from_disk.items())
+            vectors.update(from_disk)
+            missing = [k for k in missing if k not in vectors]
+
+        if missing:
+            first_index = {}
+            for i, key in enumerate(keys):
+                first_index.setdefault(key, i)
+            embedded = self._inner([texts[first_index[k]] for k in missing])
+            fresh = [(k, np.asarray(v, dtype=np.float32)) for k, v in zip(missing, embedded)]
+            self.misses += sum(counts[k] for k in missing)
+            self._remember(fresh)
+            if self._disk is not None:
+                self._disk.put_many(fresh)
+            vectors.update(fresh)
+
+        return [vectors[k] for k in keys]
+
+    def _remember(self, items):
+        with self._lock:
+            for key, vector in items:
+                if key in self._memory:
+                    continue
+                self._memory[key] = vector
+                self._memory_bytes += vector.nbytes
+            while self._memory_bytes > self.max_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.nbytes
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "memory_mb": round(self._memory_bytes / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / total, 3) if total else 0.0,
+                "disk": self._disk.vectors_path if self._disk else None
+            }
+
+    # Identity of the wrapped function, so Chroma sees the same embedding config
+    def name(self):
+        return self._inner.name()
+
+    def get_config(self):
+        return self._inner.get_config()
+
+    @staticmethod
+    def build_from_config(config):
+        from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+        return SentenceTransformerEmbeddingFunction.build_from_config(config)
+
+    def is_legacy(self):
+        return self._inner.is_legacy()
+
+    def default_space(self):
+        return self._inner.default_space()
+
+    def supported_spaces(self):
+        return self._inner.supported_spaces()
+
+    def validate_config_update(self, old_config, new_config):
+        return self._inner.validate_config_update(old_config, new_config)
@@ -0,0 +1,133 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from answer_cache import normalize_question
+
+EXPANSION_CACHE_PATH = "./query_expansion_cache.sqlite3"
+EXPANSION_TTL_SECONDS = 7 * 24 * 3600
+EXPANSION_MAX_ENTRIES = 5000
+
+# Stands in for the ticker in templated keys and cached expansions,
+# so "how does {T} perform" serves every ticker card.
+TICKER_PLACEHOLDER = "{T}"
+
+# ===============================
+# Persistent store
+# ===============================
+class ExpansionCache:
+    """Small SQLite-backed cache of LLM query expansions with TTL and size cap."""
+
+    def __init__(self, path=None, ttl_seconds=EXPANSION_TTL_SECONDS, max_entries=EXPANSION_MAX_ENTRIES):
+        self.path = path or EXPANSION_CACHE_PATH
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS expansions (
+                    key TEXT PRIMARY KEY,
+                    queries TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT queries, created_at FROM expansions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] + self.ttl_seconds <= now:
+                if row is not None:
+                    conn.execute("DELETE FROM expansions WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE expansions SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key, queries):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO expansions (key, queries, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(queries), now, now)
+            )
+            # Least recently used entries beyond the cap go first
+            conn.execute(
+                """
+                DELETE FROM expansions WHERE key IN (
+                    SELECT key FROM expansions ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM expansions").fetchone()[0]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+# ===============================
+# Keys & templating
+# ===============================
+def _ticker_pattern(ticker):
+    return re.compile(rf"(?<![\w.]){re.escape(ticker)}(?![\w])", re.IGNORECASE)
+
+def expansion_key(query: str, ticker: str = None):
+    """
+    Returns (key, templated). With a ticker that appears in the query the
+    key is ticker-independent, e.g. "how does {T} perform".
+    """
+    # Same normalization as the answer cache, so both key a question alike
+    key = normalize_question(query)
+    if ticker:
+        templated_key, n = _ticker_pattern(ticker).subn(TICKER_PLACEHOLDER, key)
+        if n:
+            return "T:" + templated_key, True
+    return "Q:" + key, False
+
+def template_expansions(lines, ticker):
+    """Replaces the ticker with the placeholder; lines without the ticker are dropped
+    because they may name this specific company and would not fit other tickers."""
+    pattern = _ticker_pattern(ticker)
+    return [pattern.sub(TICKER_PLACEHOLDER, l) for l in lines if pattern.search(l)]
+
+def fill_expansions(lines, ticker):
+    return [l.replace(TICKER_PLACEHOLDER, ticker.upper()) for l in lines]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_expansion_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExpansionCache()
+    return _cache
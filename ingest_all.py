@@ -4,88 +4,242 @@ from ingestion.price_summaries import fetch_price_summary
 from ingestion.macro_markets import fetch_macro_docs
 from ingestion.alphavantage_news import fetch_alphavantage_news
 from ingestion.moneycontrol import fetch_moneycontrol_news
+from ingestion.seen_ledger import get_seen_ledger
 from vector_store import get_collection
+from retention import is_expired
+from answer_cache import bump_corpus_version
+from lexicon import lexical_metadata
+from bm25_index import get_bm25_index
+from near_duplicates import collapse_near_duplicates, get_fingerprint_index
+from symbol_index import get_symbol_index
+from multiquery import extract_summary
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
 ALPHAVANTAGE_API_KEY = "YOUR API KEY"
 
-def ingest_all(symbol):
-    asset = resolve_asset(symbol)
-    collection = get_collection()
-
-    print(
-        f"🚀 Starting ingestion for {asset['symbol']} "
-        f"({asset['asset_type']}, {asset['market']})"
-    )
-
-    docs = []
+# Seconds to wait for each source before giving up on it for this run
+SOURCE_TIMEOUTS = {
+    "google_news": 20,
+    "alphavantage_news": 30,
+    "moneycontrol": 20,
+    "price_summary": 30,
+    "macro": 45,
+}
+DEFAULT_SOURCE_TIMEOUT = 30
+
+def _price_summary_docs(symbol):
+    price_doc = fetch_price_summary(symbol, ALPHAVANTAGE_API_KEY)
+    return [price_doc] if price_doc else []
+
+def stamp_asset_fields(docs, asset):
+    """
+    Sets asset_type/market on every doc from resolve_asset, so scope
+    filters see the same values whichever source produced the doc.
+    """
+    resolved = {asset["symbol"]: asset}
+    for d in docs:
+        meta = d["metadata"]
+        symbol = meta.get("symbol", meta.get("ticker")) or asset["symbol"]
+        if symbol not in resolved:
+            resolved[symbol] = resolve_asset(symbol)
+        meta["asset_type"] = resolved[symbol]["asset_type"]
+        meta["market"] = resolved[symbol]["market"]
+
+def build_source_plan(asset):
+    """
+    Returns the (source_name, fetch_fn) pairs to run for an asset.
+    Each fetch_fn takes no arguments and returns a list of docs.
+    """
+    symbol = asset["symbol"]
+    asset_type = asset["asset_type"]
 
     # ---- EQUITY ----
-    if asset["asset_type"] == "equity":
-        print("🔹 Fetching Equity News (Google News)...")
-        docs += fetch_google_news(asset["symbol"], asset["asset_type"])
-        
-        print("🔹 Fetching Equity News (AlphaVantage)...")
-        docs += fetch_alphavantage_news(asset["symbol"], ALPHAVANTAGE_API_KEY)
-
+    if asset_type == "equity":
+        plan = [
+            ("google_news", lambda: fetch_google_news(symbol, asset_type)),
+            ("alphavantage_news", lambda: fetch_alphavantage_news(symbol, ALPHAVANTAGE_API_KEY)),
+        ]
         if asset["market"] == "IN":
-            print("🔹 Fetching Equity News (MoneyControl)...")
-            from ingestion.moneycontrol import fetch_moneycontrol_news
-            docs += fetch_moneycontrol_news(asset["symbol"])
-
-        print("🔹 Fetching Price Summary...")
-        price_doc = fetch_price_summary(asset["symbol"], ALPHAVANTAGE_API_KEY)
-        if price_doc:
-            docs.append(price_doc)
+            plan.append(("moneycontrol", lambda: fetch_moneycontrol_news(symbol)))
+        plan.append(("price_summary", lambda: _price_summary_docs(symbol)))
+        return plan
 
     # ---- COMMODITY / FOREX ----
-    elif asset["asset_type"] in ("commodity", "forex"):
-        print("🔹 Fetching Macro News...")
-        docs += fetch_macro_docs(ALPHAVANTAGE_API_KEY)
-        
-        print("🔹 Fetching Qualitative News (Google)...")
-        docs += fetch_google_news(asset["symbol"], asset["asset_type"])
-
-        print("🔹 Fetching Price Summary...")
-        price_doc = fetch_price_summary(asset["symbol"], ALPHAVANTAGE_API_KEY)
-        if price_doc:
-            docs.append(price_doc)
+    if asset_type in ("commodity", "forex"):
+        return [
+            ("macro", lambda: fetch_macro_docs(ALPHAVANTAGE_API_KEY)),
+            ("google_news", lambda: fetch_google_news(symbol, asset_type)),
+            ("price_summary", lambda: _price_summary_docs(symbol)),
+        ]
 
     # ---- INDEX ----
-    elif asset["asset_type"] == "index":
-        print("🔹 Fetching Index News...")
-        docs += fetch_google_news(asset["symbol"])
+    if asset_type == "index":
+        return [("google_news", lambda: fetch_google_news(symbol, asset_type))]
+
+    print("⚠️ Unknown asset type, falling back to news only")
+    return [("google_news", lambda: fetch_google_news(symbol, asset_type))]
+
+def fetch_sources_concurrently(plan):
+    """
+    Runs every source of the plan in parallel with its own timeout.
+    Returns (docs, source_timings) where source_timings maps source name to
+    {"seconds", "docs", "status"}.
+    """
+    docs = []
+    timings = {}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, len(plan)), thread_name_prefix="ingest")
+    started = time.perf_counter()
+    futures = {}
+    for name, fetch_fn in plan:
+        print(f"🔹 Fetching {name}...")
+        futures[name] = executor.submit(_timed_fetch, fetch_fn)
+
+    for name, future in futures.items():
+        timeout = SOURCE_TIMEOUTS.get(name, DEFAULT_SOURCE_TIMEOUT)
+        remaining = max(0.0, started + timeout - time.perf_counter())
+        try:
+            source_docs, seconds, error = future.result(timeout=remaining)
+        except FuturesTimeoutError:
+            print(f"⚠️ {name} timed out after {timeout}s, skipping it")
+            timings[name] = {"seconds": timeout, "docs": 0, "status": "timeout"}
+            continue
+        docs += source_docs
+        timings[name] = _source_timing(name, source_docs, seconds, error)
+
+    # Don't block on sources that timed out; their threads finish on their own
+    executor.shutdown(wait=False)
+    return docs, timings
+
+def fetch_sources_sequentially(plan):
+    docs = []
+    timings = {}
+    for name, fetch_fn in plan:
+        print(f"🔹 Fetching {name}...")
+        source_docs, seconds, error = _timed_fetch(fetch_fn)
+        docs += source_docs
+        timings[name] = _source_timing(name, source_docs, seconds, error)
+    return docs, timings
+
+def _timed_fetch(fetch_fn):
+    start = time.perf_counter()
+    try:
+        result, error = fetch_fn() or [], None
+    except Exception as e:
+        result, error = [], e
+    return result, time.perf_counter() - start, error
+
+def _source_timing(name, source_docs, seconds, error):
+    if error is not None:
+        print(f"⚠️ {name} failed: {error}")
+    return {
+        "seconds": round(seconds, 3),
+        "docs": len(source_docs),
+        "status": "error" if error is not None else "ok"
+    }
+
+def ingest_all(symbol, concurrent=True):
+    asset = resolve_asset(symbol)
+    collection = get_collection()
+
+    print(
+        f"🚀 Starting ingestion for {asset['symbol']} "
+        f"({asset['asset_type']}, {asset['market']})"
+    )
 
+    plan = build_source_plan(asset)
+    started = time.perf_counter()
+    if concurrent:
+        docs, source_timings = fetch_sources_concurrently(plan)
     else:
-        print("⚠️ Unknown asset type, falling back to news only")
-        docs += fetch_google_news(asset["symbol"])
+        docs, source_timings = fetch_sources_sequentially(plan)
+    fetch_seconds = round(time.perf_counter() - started, 3)
+
+    for name, t in source_timings.items():
+        print(f"   ⏱️ {name}: {t['seconds']}s, {t['docs']} docs ({t['status']})")
+    print(f"   ⏱️ Fetch wall time: {fetch_seconds}s")
+
+    report = {
+        "symbol": asset["symbol"],
+        "fetch_seconds": fetch_seconds,
+        "source_timings": source_timings,
+        "inserted": 0,
+        "near_duplicates": 0,
+        "expired": 0
+    }
 
     if not docs:
         print("❌ No documents collected.")
-        return
+        return report
 
     print(f"📊 Total documents collected: {len(docs)}")
+    stamp_asset_fields(docs, asset)
+
+    # Feeds keep serving old articles: never store what retention would delete
+    now = time.time()
+    expired_ids = [d["id"] for d in docs if is_expired(d["metadata"], now)]
+    if expired_ids:
+        skipped = set(expired_ids)
+        docs = [d for d in docs if d["id"] not in skipped]
+        # ...and let the fetchers drop them before parsing next time
+        get_seen_ledger().mark(skipped)
+        report["expired"] = len(expired_ids)
+        print(f"🧹 Skipped {len(expired_ids)} documents older than the retention window")
+    if not docs:
+        print("ℹ️ No documents inside the retention window.")
+        return report
 
-    # ---- Deduplication ----
     # ---- Deduplication ----
     # Deduplicate within the batch (keep last occurrence)
     unique_docs_map = {d["id"]: d for d in docs}
     unique_docs = list(unique_docs_map.values())
 
     ids = [d["id"] for d in unique_docs]
-    existing = set(collection.get(ids=ids)["ids"])
+    existing = set(collection.get(ids=ids, include=[])["ids"])
     new_docs = [d for d in unique_docs if d["id"] not in existing]
+    # Stored before the ledger existed: fetchers can skip these next time
+    get_seen_ledger().mark(existing)
+
+    # Same story from another source: merge its URL instead of embedding it again
+    candidate_ids = [d["id"] for d in new_docs]
+    new_docs, merged = collapse_near_duplicates(new_docs, collection)
+    report["near_duplicates"] = merged
+    # Copies folded into a twin: fetchers can drop them before parsing next time
+    kept_ids = {d["id"] for d in new_docs}
+    merged_ids = [doc_id for doc_id in candidate_ids if doc_id not in kept_ids]
+    if merged:
+        print(f"🔗 Merged {merged} near-duplicate stories from other sources")
 
     if not new_docs:
+        # Every copy went into an already stored twin (updated above)
+        get_seen_ledger().mark(merged_ids)
         print("ℹ️ No new documents to insert.")
-        return
+        return report
+
+    # Lexicon scores are computed once here and read at query time
+    for d in new_docs:
+        d["metadata"].update(lexical_metadata(extract_summary(d["text"])))
 
     print(f"💾 Inserting {len(new_docs)} documents...")
     for i in docs:
         print(i["text"])
+    new_ids = [d["id"] for d in new_docs]
+    new_texts = [d["text"] for d in new_docs]
+    new_metas = [d["metadata"] for d in new_docs]
     collection.upsert(
-        ids=[d["id"] for d in new_docs],
-        documents=[d["text"] for d in new_docs],
-        metadatas=[d["metadata"] for d in new_docs]
+        ids=new_ids,
+        documents=new_texts,
+        metadatas=new_metas
     )
+    get_bm25_index().add_documents(new_ids, new_texts, new_metas)
+    get_fingerprint_index().add_documents(new_ids, new_metas)
+    get_symbol_index().add_documents(new_ids, new_metas)
+    get_seen_ledger().mark(new_ids + merged_ids)
+
+    # Invalidate cached answers that were built without these docs
+    bump_corpus_version({asset["symbol"]} | {d["metadata"].get("symbol") for d in new_docs})
 
+    report["inserted"] = len(new_docs)
     print(f"✅ Ingestion complete for {asset['symbol']}")
+    return report
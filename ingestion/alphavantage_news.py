@@ -1,6 +1,10 @@
-import requests
 import hashlib
 from datetime import datetime
+from ingestion.http_client import fetch_json
+from ingestion.asset_registry import is_indian_market
+from ingestion.seen_ledger import get_seen_ledger
+
+ALPHAVANTAGE_URL = "https://www.alphavantage.co/query"
 
 def generate_doc_id(seed: str):
     return hashlib.sha256(seed.encode()).hexdigest()
@@ -10,17 +14,15 @@ def fetch_alphavantage_news(ticker, api_key, limit=5):
     Fetches news sentiment data from AlphaVantage for a specific ticker.
     """
     
-    url = (
-        "https://www.alphavantage.co/query"
-        f"?function=NEWS_SENTIMENT"
-        f"&tickers={ticker}"
-        f"&limit={limit}"
-        f"&apikey={api_key}"
-    )
+    params = {
+        "function": "NEWS_SENTIMENT",
+        "tickers": ticker,
+        "limit": limit,
+        "apikey": api_key
+    }
     
     try:
-        response = requests.get(url)
-        data = response.json()
+        data = fetch_json(ALPHAVANTAGE_URL, params=params)
         
         # Check for API errors or limit messages
         if "Note" in data:
@@ -30,25 +32,29 @@ def fetch_alphavantage_news(ticker, api_key, limit=5):
             
         feed = data.get("feed", [])
 
-        if not feed and ("IN" in ticker or ticker in ["ITC", "HDFCBANK", "RELIANCE", "NATIONALUM", "KTKBANK"]):
+        indian = is_indian_market(ticker)
+        if indian is None:
+            # Never resolved: fall back to the old guess
+            indian = "IN" in ticker or ticker in ["ITC", "HDFCBANK", "RELIANCE", "NATIONALUM", "KTKBANK"]
+
+        if not feed and indian:
             # Retry with .BSE suffix for Indian stocks if no news found
             print(f"   ⚠️ No news for {ticker}, retrying with {ticker}.BSE...")
-            url = (
-                "https://www.alphavantage.co/query"
-                f"?function=NEWS_SENTIMENT"
-                f"&tickers={ticker}.BSE"
-                f"&limit={limit}"
-                f"&apikey={api_key}"
-            )
             try:
-                response = requests.get(url)
-                data = response.json()
+                data = fetch_json(ALPHAVANTAGE_URL, params={**params, "tickers": f"{ticker}.BSE"})
                 feed = data.get("feed", [])
             except Exception as e:
                 print(f"   ❌ Retry failed: {e}")
 
+        # Drop items that are already stored before any parsing
+        doc_ids = [generate_doc_id(item.get("url", "") + ticker) for item in feed]
+        unseen = get_seen_ledger().filter_unseen("alphavantage_news", doc_ids)
+
         documents = []
-        for item in feed:
+        skipped = []
+        for item, doc_id in zip(feed, doc_ids):
+            if doc_id not in unseen:
+                continue
             title = item.get("title", "")
             summary = item.get("summary", "")
             source = item.get("source", "AlphaVantage")
@@ -76,6 +82,7 @@ def fetch_alphavantage_news(ticker, api_key, limit=5):
             
             # Filter low relevance news if needed (e.g., < 0.1)
             if relevance_score < 0.15:
+                skipped.append(doc_id)
                 continue
 
             # Create document text
@@ -86,8 +93,6 @@ Summary: {summary}
 Sentiment: {sentiment_label} (Score: {sentiment_score})
 """.strip()
             
-            doc_id = generate_doc_id(url + ticker)
-            
             documents.append({
                 "id": doc_id,
                 "text": text,
@@ -107,6 +112,8 @@ Sentiment: {sentiment_label} (Score: {sentiment_score})
                 }
             })
             
+        # Off-topic items are rejected the same way next run; don't re-parse them
+        get_seen_ledger().mark_skipped("alphavantage_news", skipped)
 
         return documents
         
@@ -0,0 +1,107 @@
+# ingestion/asset_registry.py
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+REGISTRY_PATH = "./asset_registry.sqlite3"
+RESOLVED_TTL_SECONDS = 30 * 24 * 3600   # markets/listings rarely change
+UNKNOWN_TTL_SECONDS = 24 * 3600         # negative cache for unresolvable symbols
+
+_lock = threading.Lock()
+_initialized = False
+
+
+@contextmanager
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(REGISTRY_PATH, timeout=5)
+    try:
+        with conn:
+            if not _initialized:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS assets (
+                        symbol TEXT PRIMARY KEY,
+                        asset_type TEXT NOT NULL,
+                        market TEXT NOT NULL,
+                        yf_suffix TEXT NOT NULL DEFAULT '',
+                        resolved_at REAL NOT NULL,
+                        name TEXT NOT NULL DEFAULT ''
+                    )
+                    """
+                )
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(assets)")}
+                if "name" not in columns:
+                    # Registries created before company names were stored
+                    conn.execute("ALTER TABLE assets ADD COLUMN name TEXT NOT NULL DEFAULT ''")
+                _initialized = True
+            yield conn
+    finally:
+        conn.close()
+
+
+def lookup(symbol: str):
+    """
+    Returns the stored resolution for a symbol, or None if it was never
+    resolved or has expired. Never touches the network.
+    """
+    s = symbol.upper().strip()
+    with _lock, _connect() as conn:
+        row = conn.execute(
+            "SELECT asset_type, market, yf_suffix, resolved_at, name FROM assets WHERE symbol = ?", (s,)
+        ).fetchone()
+    if row is None:
+        return None
+
+    asset_type, market, yf_suffix, resolved_at, name = row
+    ttl = UNKNOWN_TTL_SECONDS if market == "UNKNOWN" else RESOLVED_TTL_SECONDS
+    if time.time() - resolved_at > ttl:
+        return None
+
+    return {
+        "symbol": s,
+        "asset_type": asset_type,
+        "market": market,
+        "yf_suffix": yf_suffix,
+        "name": name
+    }
+
+
+def store(symbol: str, asset_type: str, market: str, yf_suffix: str = "", name: str = ""):
+    s = symbol.upper().strip()
+    with _lock, _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO assets (symbol, asset_type, market, yf_suffix, resolved_at, name) VALUES (?, ?, ?, ?, ?, ?)",
+            (s, asset_type, market, yf_suffix or "", time.time(), name or "")
+        )
+
+
+def yf_symbol_for(symbol: str):
+    """yfinance symbol from the registry (e.g. ITC -> ITC.NS), or None if unknown."""
+    entry = lookup(symbol)
+    if entry is None or entry["market"] == "UNKNOWN":
+        return None
+    return entry["symbol"] + entry["yf_suffix"]
+
+
+def is_indian_market(symbol: str):
+    """True/False from the registry, None if the symbol was never resolved."""
+    entry = lookup(symbol)
+    if entry is None or entry["market"] == "UNKNOWN":
+        return None
+    return entry["market"] == "IN"
+
+
+def names_for(symbols):
+    """{symbol: company name} for resolved symbols that have one (no network)."""
+    wanted = [s.upper().strip() for s in symbols]
+    if not wanted:
+        return {}
+    with _lock, _connect() as conn:
+        rows = conn.execute(
+            f"SELECT symbol, name FROM assets WHERE name != '' AND symbol IN ({','.join('?' * len(wanted))})",
+            wanted
+        ).fetchall()
+    return dict(rows)
@@ -2,6 +2,7 @@
 
 import re
 import yfinance as yf
+from ingestion import asset_registry
 
 FOREX_PATTERNS = [
     r"^[A-Z]{6}$",        # EURUSD, USDINR
@@ -45,9 +46,18 @@ def resolve_asset(symbol: str):
         }
 
     # ---- Equity (default) ----
-    # ---- Equity (default) ----
+    # Known symbols come straight from the local registry, no network
+    cached = asset_registry.lookup(s)
+    if cached:
+        return {
+            "symbol": s,
+            "asset_type": cached["asset_type"],
+            "market": cached["market"]
+        }
+
     # Attempt auto-detection using yfinance
     market = "UNKNOWN"
+    yf_suffix = ""
     try:
         # Check standard ticker first
         ticker = s
@@ -59,6 +69,8 @@ def resolve_asset(symbol: str):
              info_ns = yf.Ticker(f"{s}.NS").info
              if info_ns and info_ns.get("currency") == "INR":
                  market = "IN"
+                 yf_suffix = ".NS"
+                 info = info_ns
              elif currency == "INR":
                  market = "IN"
              else:
@@ -68,8 +80,13 @@ def resolve_asset(symbol: str):
         elif currency in ["USD", "EUR", "GBP"]:
              market = "GLOBAL"
 
+        name = info.get("longName") or info.get("shortName") or ""
+
+        # Only remember real answers; UNKNOWN is negative-cached for a shorter TTL
+        asset_registry.store(s, "equity", market, yf_suffix, name)
+
     except Exception:
-        # Fallback if network/yfinance fails
+        # Fallback if network/yfinance fails (not cached, retried next time)
         pass
 
     return {
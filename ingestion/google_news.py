@@ -1,9 +1,11 @@
-import feedparser
 import hashlib
 from datetime import datetime
 from bs4 import BeautifulSoup
-from urllib.parse import quote_plus
-from llm_summary_required import needs_llm_summary
+from ingestion.http_client import fetch_feed
+from llm_summary_required import needs_llm_summary_batch
+from ingestion.seen_ledger import get_seen_ledger
+
+GOOGLE_NEWS_RSS_URL = "https://news.google.com/rss/search"
 
 def clean_html(text):
     return BeautifulSoup(text, "html.parser").get_text(" ", strip=True)
@@ -25,20 +27,34 @@ def build_news_query(symbol, asset_type):
 def fetch_google_news(symbol, asset_type, limit=10):
     query = build_news_query(symbol, asset_type)
 
-    encoded_query = quote_plus(query)
-    rss_url = (
-        f"https://news.google.com/rss/search?"
-        f"q={encoded_query}&hl=en-IN&gl=IN&ceid=IN:en"
-    )
+    rss_params = {"q": query, "hl": "en-IN", "gl": "IN", "ceid": "IN:en"}
 
     print(f"🔎 Google News query: {query}")
-    feed = feedparser.parse(rss_url)
+    try:
+        feed = fetch_feed(GOOGLE_NEWS_RSS_URL, params=rss_params)
+    except Exception as e:
+        print(f"   ❌ Error fetching Google News RSS: {e}")
+        return []
 
     documents = []
 
-    for entry in feed.entries[:limit]:
+    entries = feed.entries[:limit]
+
+    # Drop entries that are already stored before cleaning or scoring them
+    doc_ids = [generate_doc_id(entry.link) for entry in entries]
+    unseen = get_seen_ledger().filter_unseen("google_news", doc_ids)
+    entries = [entry for entry, doc_id in zip(entries, doc_ids) if doc_id in unseen]
+    doc_ids = [doc_id for doc_id in doc_ids if doc_id in unseen]
+
+    summaries = [clean_html(entry.get("summary", "")) for entry in entries]
+
+    # Check which RSS summaries need LLM enhancement, whole feed at once
+    requires_llm_flags = needs_llm_summary_batch(
+        [(entry.title, summary) for entry, summary in zip(entries, summaries)]
+    )
+
+    for entry, doc_id, summary, requires_llm in zip(entries, doc_ids, summaries, requires_llm_flags):
         title = entry.title
-        summary = clean_html(entry.get("summary", ""))
         link = entry.link
 
         published = entry.get("published", "")
@@ -50,11 +66,6 @@ def fetch_google_news(symbol, asset_type, limit=10):
             publish_time = datetime.now()
 
 
-        doc_id = generate_doc_id(link)
-
-        # Check if RSS summary needs LLM enhancement
-        requires_llm = needs_llm_summary(title, summary)
-        
         # If summary is poor quality, store empty summary for LLM backfill
         final_summary = summary if not requires_llm else ""
 
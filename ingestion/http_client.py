@@ -0,0 +1,110 @@
+# ingestion/http_client.py
+
+import asyncio
+import threading
+
+import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds. Nothing in ingestion may wait forever on a host.
+DEFAULT_TIMEOUT = (5, 20)
+
+POOL_CONNECTIONS = 10   # distinct hosts kept in the pool
+POOL_MAXSIZE = 20       # keep-alive connections per host
+
+USER_AGENT = "TradersParadise/1.0 (+news ingestion)"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    session = requests.Session()
+
+    retry = Retry(
+        total=2,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+def get_session():
+    """Shared pooled keep-alive session used by every fetcher in ingestion/."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session():
+    """Closes pooled connections (tests, or after a fork)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+# ===============================
+# Blocking API
+# ===============================
+def fetch(url, params=None, timeout=DEFAULT_TIMEOUT):
+    response = get_session().get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def fetch_json(url, params=None, timeout=DEFAULT_TIMEOUT):
+    return fetch(url, params=params, timeout=timeout).json()
+
+
+def fetch_feed(url, params=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Downloads an RSS/Atom feed through the pooled session and parses it.
+    feedparser is only given bytes, so it never opens its own connection.
+    """
+    response = fetch(url, params=params, timeout=timeout)
+    return feedparser.parse(
+        response.content,
+        response_headers={"content-location": response.url, **response.headers},
+    )
+
+
+# ===============================
+# asyncio API
+# ===============================
+# requests is blocking, so the coroutines run it on the default executor.
+# The pooled session is shared, so concurrent coroutines still reuse
+# keep-alive connections to the same hosts.
+async def async_fetch_json(url, params=None, timeout=DEFAULT_TIMEOUT):
+    return await asyncio.to_thread(fetch_json, url, params, timeout)
+
+
+async def async_fetch_feed(url, params=None, timeout=DEFAULT_TIMEOUT):
+    return await asyncio.to_thread(fetch_feed, url, params, timeout)
+
+
+async def async_fetch_many(urls, parser="json", timeout=DEFAULT_TIMEOUT):
+    """
+    Fetches several URLs concurrently.
+    Returns results in input order; failed fetches come back as the exception.
+    """
+    fetch_fn = async_fetch_feed if parser == "feed" else async_fetch_json
+    return await asyncio.gather(
+        *(fetch_fn(url, timeout=timeout) for url in urls),
+        return_exceptions=True
+    )
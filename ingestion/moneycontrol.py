@@ -1,9 +1,10 @@
-import feedparser
 import hashlib
 from datetime import datetime
 from bs4 import BeautifulSoup
-from urllib.parse import quote_plus
-from llm_summary_required import needs_llm_summary
+from ingestion.http_client import fetch_feed
+from llm_summary_required import needs_llm_summary_batch
+from ingestion.seen_ledger import get_seen_ledger
+from ingestion import google_news
 
 def clean_html(text):
     return BeautifulSoup(text, "html.parser").get_text(" ", strip=True)
@@ -20,17 +21,13 @@ def fetch_moneycontrol_news(symbol, limit=10):
     Fetches news for a symbol specifically from MoneyControl using Google News RSS proxy.
     """
     query = build_moneycontrol_query(symbol)
-    encoded_query = quote_plus(query)
-    
-    rss_url = (
-        f"https://news.google.com/rss/search?"
-        f"q={encoded_query}&hl=en-IN&gl=IN&ceid=IN:en"
-    )
+    rss_params = {"q": query, "hl": "en-IN", "gl": "IN", "ceid": "IN:en"}
 
     print(f"   📰 Fetching MoneyControl News (via Google RSS) for {symbol}...")
     
     try:
-        feed = feedparser.parse(rss_url)
+        # Same Google News RSS endpoint, looked up at call time
+        feed = fetch_feed(google_news.GOOGLE_NEWS_RSS_URL, params=rss_params)
     except Exception as e:
         print(f"   ❌ Error checking RSS feed: {e}")
         return []
@@ -41,12 +38,24 @@ def fetch_moneycontrol_news(symbol, limit=10):
 
     print(f"   ✅ Found {len(feed.entries)} articles from MoneyControl")
 
+    entries = feed.entries[:limit]
+
+    # Drop entries that are already stored before cleaning or scoring them
+    doc_ids = [generate_doc_id(entry.link) for entry in entries]
+    unseen = get_seen_ledger().filter_unseen("moneycontrol", doc_ids)
+    entries = [entry for entry, doc_id in zip(entries, doc_ids) if doc_id in unseen]
+    doc_ids = [doc_id for doc_id in doc_ids if doc_id in unseen]
+
+    titles = [clean_html(entry.title) for entry in entries]
+    summaries = [clean_html(entry.summary) if "summary" in entry else "" for entry in entries]
+
+    # Determine which entries need an LLM summary, whole feed at once
+    requires_llm_flags = needs_llm_summary_batch(list(zip(titles, summaries)))
+
     documents = []
-    for entry in feed.entries[:limit]:
-        title = clean_html(entry.title)
+    for entry, doc_id, title, summary, requires_llm in zip(entries, doc_ids, titles, summaries, requires_llm_flags):
         link = entry.link
         published = entry.published
-        summary = clean_html(entry.summary) if "summary" in entry else ""
         
         # Parse date
         try:
@@ -54,15 +63,12 @@ def fetch_moneycontrol_news(symbol, limit=10):
             timestamp = dt.timestamp()
         except Exception:
             timestamp = datetime.now().timestamp()
-            
-        doc_id = generate_doc_id(link)
+
 
         # MoneyControl specific reliable source check
         # (Though we filtered by site, double check source title if available)
         source_title = entry.source.title if "source" in entry else "MoneyControl"
 
-        # Determine if we need LLM summary
-        requires_llm = needs_llm_summary(title, summary)
         final_summary = summary if not requires_llm else ""
 
         text = f"""
@@ -1,6 +1,8 @@
-import requests
 import hashlib
 from datetime import datetime
+from ingestion.http_client import fetch_json
+
+ALPHAVANTAGE_URL = "https://www.alphavantage.co/query"
 
 def generate_doc_id(seed: str):
     return hashlib.sha256(seed.encode()).hexdigest()
@@ -16,18 +18,16 @@ def fetch_price_summary(ticker, api_key):
     
     query_symbol = COMMODITY_MAP.get(ticker.upper(), ticker)
 
-    url = (
-        "https://www.alphavantage.co/query"
-        f"?function=TIME_SERIES_DAILY"
-        f"&symbol={query_symbol}"
-        f"&apikey={api_key}"
-    )
+    params = {
+        "function": "TIME_SERIES_DAILY",
+        "symbol": query_symbol,
+        "apikey": api_key
+    }
 
     print(f"   💸 Fetching Price Summary for {ticker} (Query: {query_symbol})...")
     # print(f"   🔗 URL: {url}") # Careful printing API keys
     try:
-        response = requests.get(url)
-        data = response.json()
+        data = fetch_json(ALPHAVANTAGE_URL, params=params)
     except Exception as e:
         print(f"   ❌ Error fetching price data: {e}")
         return None
@@ -0,0 +1,194 @@
+"""
+Seen-document ledger for the news fetchers.
+
+Most entries in a refresh are already stored, yet each one used to be
+cleaned, scored by needs_llm_summary and looked up in the vector store
+before being thrown away. Fetchers now check their doc ids here right
+after generate_doc_id and drop known entries before any parsing.
+
+An in-memory Bloom filter answers "definitely new" without I/O; its
+positives are confirmed against an exact SQLite table, so a false positive
+never drops a new document. ingest_all marks ids once they are stored;
+only explicit purges (delete_news_for_ticker) unmark them, so articles
+removed by retention are not fetched again.
+
+    python -m ingestion.seen_ledger    # rebuild from the vector store
+"""
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+SEEN_LEDGER_PATH = "./stock_news_seen.sqlite3"
+BLOOM_CAPACITY = 200_000
+BLOOM_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenLedger:
+    def __init__(self, path=None, capacity=BLOOM_CAPACITY):
+        self.path = path or SEEN_LEDGER_PATH
+        self._lock = threading.Lock()
+        self._counters = {}
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen (doc_id TEXT PRIMARY KEY, first_seen REAL NOT NULL) WITHOUT ROWID"
+            )
+        self._load_bloom(capacity)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _load_bloom(self, capacity=BLOOM_CAPACITY):
+        with self._connect() as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM seen").fetchone()
+            bloom = BloomFilter(max(capacity, 2 * count))
+            for (doc_id,) in conn.execute("SELECT doc_id FROM seen"):
+                bloom.add(doc_id)
+        self._bloom = bloom
+
+    def _counter(self, source):
+        return self._counters.setdefault(source, {"hits": 0, "misses": 0, "bloom_false_positives": 0, "skipped": 0})
+
+    def filter_unseen(self, source, ids):
+        """Set of ids not stored yet. Counts hits (known) and misses (new) for source."""
+        ids = list(dict.fromkeys(ids))
+        with self._lock:
+            candidates = [doc_id for doc_id in ids if doc_id in self._bloom]
+
+        known = set()
+        if candidates:
+            with self._connect() as conn:
+                for start in range(0, len(candidates), 500):
+                    chunk = candidates[start:start + 500]
+                    known.update(
+                        doc_id for (doc_id,) in conn.execute(
+                            f"SELECT doc_id FROM seen WHERE doc_id IN ({','.join('?' * len(chunk))})", chunk
+                        )
+                    )
+
+        unseen = set(ids) - known
+        with self._lock:
+            counter = self._counter(source)
+            counter["hits"] += len(known)
+            counter["misses"] += len(unseen)
+            counter["bloom_false_positives"] += len(candidates) - len(known)
+        return unseen
+
+    def mark(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        now = time.time()
+        with self._lock:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO seen (doc_id, first_seen) VALUES (?, ?)",
+                    [(doc_id, now) for doc_id in ids]
+                )
+            for doc_id in ids:
+                self._bloom.add(doc_id)
+            if self._bloom.count > self._bloom.capacity:
+                # Past capacity the error rate climbs; resize from the exact table
+                self._load_bloom(2 * self._bloom.capacity)
+
+    def mark_skipped(self, source, ids):
+        """Marks ids a fetcher parsed and rejected (e.g. off-topic) so they aren't parsed again."""
+        ids = list(ids)
+        if not ids:
+            return
+        self.mark(ids)
+        with self._lock:
+            self._counter(source)["skipped"] += len(ids)
+
+    def unmark(self, ids):
+        # Bloom bits stay set; the exact table turns those into misses
+        ids = list(ids)
+        removed = 0
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                removed += conn.execute(
+                    f"DELETE FROM seen WHERE doc_id IN ({','.join('?' * len(chunk))})", chunk
+                ).rowcount
+        return removed
+
+    def rebuild(self, collection, batch_size=500):
+        """Re-seeds the ledger with every id in the collection."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM seen")
+        offset = 0
+        while True:
+            page = collection.get(limit=batch_size, offset=offset, include=[])
+            if not page["ids"]:
+                break
+            self.mark(page["ids"])
+            offset += len(page["ids"])
+        with self._lock:
+            self._load_bloom()
+        return offset
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM seen").fetchone()
+        with self._lock:
+            sources = {source: dict(counter) for source, counter in self._counters.items()}
+        for counter in sources.values():
+            lookups = counter["hits"] + counter["misses"]
+            counter["hit_rate"] = round(counter["hits"] / lookups, 3) if lookups else 0.0
+        return {
+            "documents": count,
+            "bloom_bits": self._bloom.bits,
+            "bloom_hashes": self._bloom.hashes,
+            "sources": sources,
+            "path": self.path
+        }
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_seen_ledger():
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = SeenLedger()
+    return _ledger
+
+
+if __name__ == "__main__":
+    from vector_store import get_collection
+    count = get_seen_ledger().rebuild(get_collection())
+    print(f"✅ Seen ledger rebuilt: {count} documents")
@@ -1,10 +1,26 @@
-import yfinance as yf
+import threading
+import time
 import traceback
+from concurrent.futures import Future
+
+import pandas as pd
+import yfinance as yf
+
+from ingestion.asset_registry import yf_symbol_for
+
+QUOTE_TTL_SECONDS = 60              # price fields
+FUNDAMENTALS_TTL_SECONDS = 6 * 3600 # pe/roe/market cap barely move intraday
+MISSING_QUOTE_TTL_SECONDS = 15      # don't hammer yfinance for unknown symbols
 
 def fetch_stock_details(ticker: str):
+    """Network fetch of stock details (no cache). See get_stock_details."""
+    data, _ = _fetch_details(ticker)
+    return data
+
+def _fetch_details(ticker: str):
     """
     Fetches detailed financial metrics for a stock using yfinance.
-    Returns a dictionary with:
+    Returns (details, yfinance_symbol_used). details is a dictionary with:
     - current_price, high, low, volume
     - pe_ratio, roe, profit_margin
     - market_cap, sector
@@ -26,15 +42,21 @@ def fetch_stock_details(ticker: str):
         
 
 
+        # Use the suffix resolve_asset already stored for this symbol, if any.
+        known_symbol = yf_symbol_for(ticker)
+        if known_symbol:
+            y_ticker = known_symbol
+
         # We will try the ticker as is. If data is missing, we might try appending .NS for common Indian stocks
         stock = yf.Ticker(y_ticker)
         info = stock.info
         
         # If 'regularMarketPrice' is missing, it might be the wrong ticker format.
-        if "regularMarketPrice" not in info and "currentPrice" not in info:
+        if not known_symbol and "regularMarketPrice" not in info and "currentPrice" not in info:
             if not ticker.endswith(".NS") and not ticker.endswith(".BO"):
                  print(f"   ⚠️ Possible missing Indian suffix for {ticker}, trying {ticker}.NS...")
-                 stock = yf.Ticker(f"{ticker}.NS")
+                 y_ticker = f"{ticker}.NS"
+                 stock = yf.Ticker(y_ticker)
                  info = stock.info
         
         # Extract metrics
@@ -73,9 +95,184 @@ def fetch_stock_details(ticker: str):
         }
         
         print(f"   ✅ Successfully fetched details for {ticker}")
-        return data
+        return data, y_ticker
 
     except Exception as e:
         print(f"   ❌ Error fetching yfinance data for {ticker}: {e}")
         traceback.print_exc()
-        return None
+        return None, None
+
+
+# ===============================
+# Cached quote service
+# ===============================
+class QuoteService:
+    """
+    Short-TTL cache in front of yfinance.
+
+    - get(): cached details; concurrent lookups of the same symbol share one fetch.
+    - refresh_many(): refreshes prices for many tickers with one bulk
+      yf.download, reusing cached fundamentals and the yfinance symbol
+      (e.g. ITC -> ITC.NS) found by the last full fetch.
+    """
+
+    def __init__(self, ttl_seconds=QUOTE_TTL_SECONDS, fundamentals_ttl_seconds=FUNDAMENTALS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.fundamentals_ttl_seconds = fundamentals_ttl_seconds
+        self._lock = threading.Lock()
+        # ticker -> {"data", "yf_symbol", "price_at", "fundamentals_at"}
+        self._entries = {}
+        self._inflight = {}   # ticker -> Future
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _is_fresh(self, entry, now):
+        if entry["data"] is None:
+            return now - entry["price_at"] < MISSING_QUOTE_TTL_SECONDS
+        return now - entry["price_at"] < self.ttl_seconds
+
+    def get(self, ticker: str):
+        ticker = ticker.upper()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry and self._is_fresh(entry, now):
+                self.hits += 1
+                return entry["data"]
+            future = self._inflight.get(ticker)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[ticker] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            data, yf_symbol = _fetch_details(ticker)
+            self._store(ticker, data, yf_symbol, full=True)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(ticker, None)
+
+    def _store(self, ticker, data, yf_symbol, full):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(ticker, {"yf_symbol": yf_symbol, "fundamentals_at": 0})
+            entry["data"] = data
+            entry["price_at"] = now
+            if yf_symbol:
+                entry["yf_symbol"] = yf_symbol
+            if full and data is not None:
+                entry["fundamentals_at"] = now
+            self._entries[ticker] = entry
+
+    def refresh_many(self, tickers):
+        """
+        Bulk-refreshes prices for every ticker that is stale. Tickers without
+        recent fundamentals get a regular (coalesced) full fetch instead.
+        Returns the number of tickers refreshed.
+        """
+        now = time.time()
+        bulk, full = {}, []
+        with self._lock:
+            for ticker in {t.upper() for t in tickers}:
+                entry = self._entries.get(ticker)
+                if entry and self._is_fresh(entry, now):
+                    continue
+                if entry and entry["data"] and now - entry["fundamentals_at"] < self.fundamentals_ttl_seconds:
+                    bulk[entry["yf_symbol"] or ticker] = ticker
+                else:
+                    full.append(ticker)
+
+        refreshed = 0
+        if bulk:
+            refreshed += self._bulk_refresh(bulk)
+        for ticker in full:
+            self.get(ticker)
+            refreshed += 1
+        return refreshed
+
+    def _bulk_refresh(self, bulk):
+        print(f"   📊 Bulk price refresh for {sorted(bulk.values())}...")
+        try:
+            frame = yf.download(
+                tickers=list(bulk),
+                period="5d",
+                interval="1d",
+                group_by="ticker",
+                auto_adjust=False,
+                progress=False,
+                threads=True
+            )
+        except Exception as e:
+            print(f"   ❌ Bulk price refresh failed: {e}")
+            return 0
+
+        refreshed = 0
+        for yf_symbol, ticker in bulk.items():
+            try:
+                if frame.columns.nlevels > 1:
+                    if yf_symbol not in frame.columns.get_level_values(0):
+                        continue
+                    rows = frame[yf_symbol]
+                else:
+                    rows = frame
+                # A fresh intraday bar can have a close but no high/low/volume yet
+                rows = rows.dropna(subset=["Close"])
+                if rows.empty:
+                    continue
+
+                last = rows.iloc[-1]
+                price = float(last["Close"])
+                previous_close = float(rows.iloc[-2]["Close"]) if len(rows) > 1 else None
+
+                with self._lock:
+                    data = dict(self._entries[ticker]["data"])
+                data["price"] = price
+                if pd.notna(last["High"]):
+                    data["high"] = float(last["High"])
+                if pd.notna(last["Low"]):
+                    data["low"] = float(last["Low"])
+                if pd.notna(last["Volume"]):
+                    data["volume"] = int(last["Volume"])
+                if previous_close:
+                    data["change"] = price - previous_close
+                    data["change_percent"] = (data["change"] / previous_close) * 100
+                else:
+                    # Same as a full fetch without previous close; never keep a stale change
+                    data["change"] = 0.0
+                    data["change_percent"] = 0.0
+
+                self._store(ticker, data, yf_symbol, full=False)
+                refreshed += 1
+            except Exception as e:
+                # One bad ticker must not abort the refresh for the rest
+                print(f"   ⚠️ Bulk price refresh skipped {ticker}: {e}")
+        return refreshed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced
+            }
+
+
+quote_service = QuoteService()
+
+def get_stock_details(ticker: str):
+    """Cached stock details; use this instead of fetch_stock_details on request paths."""
+    return quote_service.get(ticker)
@@ -0,0 +1,134 @@
+"""
+Shared finance lexicon for sentiment, hedging and intent scoring.
+
+Every weighted term (multi-word ones included) is compiled into one
+prefix-trie regex with word-boundary guards, so a summary is lower-cased
+and scanned once and all scores come out of that single pass.
+"""
+import re
+
+# ===============================
+# Lexicons
+# ===============================
+NEGATIVE_WEIGHTS = {
+    "slides": 2, "falls": 2, "fell": 2, "drops": 2,
+    "declines": 2, "pressure": 1, "concerns": 1,
+    "uncertainty": 1, "scrutiny": 1, "weakness": 1,
+    "selloff": 3
+}
+
+POSITIVE_WEIGHTS = {
+    "rises": 2, "rose": 2, "gains": 2, "surges": 3,
+    "jumps": 2, "upgrades": 3, "raises target": 3,
+    "bullish": 2, "strong": 1, "growth": 1,
+    "optimism": 1
+}
+
+HEDGING_WORDS = {"could", "might", "may", "potential", "possibly"}
+
+# Performance intent: +1 per upward move, -1 per downward or speculative term
+POSITIVE_PERFORMANCE_WORDS = set(POSITIVE_WEIGHTS)
+NEGATIVE_PERFORMANCE_WORDS = set(NEGATIVE_WEIGHTS) | {"jitters"}
+SPECULATIVE_WORDS = HEDGING_WORDS | {"ipo"}
+
+SCORE_NAMES = ("sentiment", "hedging", "performance")
+
+# Bump when the lexicons change so scores stored in metadata are recomputed
+LEXICON_VERSION = 1
+
+# ===============================
+# Compiled matcher
+# ===============================
+def _term_table():
+    table = {}
+
+    def add(term, slot, value):
+        scores = table.setdefault(term, [0, 0, 0])
+        scores[slot] += value
+
+    for term, weight in POSITIVE_WEIGHTS.items():
+        add(term, 0, weight)
+    for term, weight in NEGATIVE_WEIGHTS.items():
+        add(term, 0, -weight)
+    for term in HEDGING_WORDS:
+        add(term, 1, 1)
+    for term in POSITIVE_PERFORMANCE_WORDS:
+        add(term, 2, 1)
+    for term in NEGATIVE_PERFORMANCE_WORDS | SPECULATIVE_WORDS:
+        add(term, 2, -1)
+
+    return {term: tuple(scores) for term, scores in table.items()}
+
+def _trie_pattern(terms):
+    """
+    Alternation factored by common prefix ("r(?:ises|ose|aises\\s+target)"),
+    which the regex engine walks far faster than a flat list of words.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        branches = [
+            (r"\s+" if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+
+    return r"(?<!\w)" + build(trie) + r"(?!\w)"
+
+_TERM_SCORES = _term_table()
+_PATTERN = re.compile(_trie_pattern(_TERM_SCORES))
+_WHITESPACE = re.compile(r"\s+")
+
+# ===============================
+# Scoring
+# ===============================
+def scan_text(text: str) -> dict:
+    """All lexical scores for one text: {"sentiment", "hedging", "performance"}."""
+    sentiment = hedging = performance = 0
+    for match in _PATTERN.findall(text.lower()):
+        scores = _TERM_SCORES.get(match) or _TERM_SCORES[_WHITESPACE.sub(" ", match)]
+        sentiment += scores[0]
+        hedging += scores[1]
+        performance += scores[2]
+    return {"sentiment": sentiment, "hedging": hedging, "performance": performance}
+
+def sum_scores(score_dicts) -> dict:
+    totals = dict.fromkeys(SCORE_NAMES, 0)
+    for scores in score_dicts:
+        for name in SCORE_NAMES:
+            totals[name] += scores[name]
+    return totals
+
+def scan_texts(texts) -> dict:
+    """Scores summed over several texts."""
+    return sum_scores(scan_text(text) for text in texts)
+
+# ===============================
+# Stored scores (document metadata)
+# ===============================
+def lexical_metadata(summary: str) -> dict:
+    """Scores for a document summary, as numeric metadata fields."""
+    scores = scan_text(summary or "")
+    meta = {f"lex_{name}": value for name, value in scores.items()}
+    meta["lex_version"] = LEXICON_VERSION
+    return meta
+
+def scores_from_metadata(meta) -> dict:
+    """Stored scores, or None if missing or computed by an older lexicon."""
+    if not meta or meta.get("lex_version") != LEXICON_VERSION:
+        return None
+    return {name: meta.get(f"lex_{name}", 0) for name in SCORE_NAMES}
+
+def document_scores(summary: str, meta) -> dict:
+    """Stored scores when current, otherwise a fresh scan of the summary."""
+    return scores_from_metadata(meta) or scan_text(summary)
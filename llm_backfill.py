@@ -1,8 +1,112 @@
+import time
+
 from vector_store import get_collection
-from llm_summarizer import summarize_from_headline
+from answer_cache import bump_corpus_version
+from lexicon import lexical_metadata
+from bm25_index import get_bm25_index
+from symbol_index import get_symbol_index
+from near_duplicates import fingerprint, get_fingerprint_index
+from llm_summarizer import summarize_from_headline, summarize_headlines_batch
 from langchain_groq import ChatGroq
 
-def backfill_llm_summaries(limit=5):
+BACKFILL_BATCH_SIZE = 10   # headlines per LLM call
+
+def _title_of(doc, meta):
+    title_line = [l for l in doc.splitlines() if l.startswith("Title:")]
+    if title_line:
+        return title_line[0].replace("Title:", "").strip()
+    return meta.get("title", "")
+
+def build_backfill_item(doc_id, doc, meta):
+    return {
+        "id": doc_id,
+        "title": _title_of(doc, meta),
+        "publisher": meta.get("publisher", "Unknown"),
+        "date": meta.get("date", "")
+    }
+
+def build_backfilled_doc(title, summary, meta):
+    new_text = f"""
+Stock: {meta.get('symbol', meta.get('ticker', 'UNKNOWN'))}
+Title: {title}
+Summary: {summary}
+""".strip()
+
+    new_meta = dict(meta)
+    new_meta["summary_source"] = "llm_headline"
+    new_meta.update(lexical_metadata(summary))
+    if new_meta.get("fingerprint"):
+        # Taken from the headline alone at ingest; later copies carry summaries
+        new_meta["fingerprint"] = format(fingerprint(title, summary), "016x")
+    return new_text, new_meta
+
+def summarize_items(llm, items, batch_size=BACKFILL_BATCH_SIZE, batch_llm=None):
+    """
+    Summarizes items ({"id", "title", "publisher", "date"}) batch_size at a
+    time. Items the batch reply misses or garbles are retried one by one.
+    batch_llm, if given, makes the batch calls (e.g. without retries).
+    Returns ({id: summary}, llm_calls).
+    """
+    summaries = {}
+    llm_calls = 0
+
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+
+        if len(batch) > 1:
+            try:
+                summaries.update(summarize_headlines_batch(batch_llm or llm, batch))
+            except Exception as e:
+                print(f"⚠️ Batch summarization failed, falling back to single calls: {e}")
+            llm_calls += 1
+
+        for item in batch:
+            if item["id"] in summaries:
+                continue
+            try:
+                summary = summarize_from_headline(
+                    llm=llm,
+                    title=item["title"],
+                    publisher=item["publisher"],
+                    date=item["date"]
+                )
+            except Exception as e:
+                print(f"⚠️ Single summarization failed for {item['title'][:60]}: {e}")
+                summary = ""
+            llm_calls += 1
+            if summary:
+                summaries[item["id"]] = summary
+
+    return summaries, llm_calls
+
+def store_backfilled_summaries(collection, summaries, by_id):
+    """
+    Writes {id: summary} back with one bulk upsert.
+    by_id maps id -> (title, meta). Returns the number of docs written.
+    """
+    upsert_ids, upsert_docs, upsert_metas = [], [], []
+    for doc_id, summary in summaries.items():
+        title, meta = by_id[doc_id]
+        new_text, new_meta = build_backfilled_doc(title, summary, meta)
+        upsert_ids.append(doc_id)
+        upsert_docs.append(new_text)
+        upsert_metas.append(new_meta)
+
+    if upsert_ids:
+        # One bulk write (and one embedding batch) for the whole run
+        collection.upsert(
+            ids=upsert_ids,
+            documents=upsert_docs,
+            metadatas=upsert_metas
+        )
+        get_bm25_index().add_documents(upsert_ids, upsert_docs, upsert_metas)
+        get_symbol_index().add_documents(upsert_ids, upsert_metas)
+        get_fingerprint_index().add_documents(upsert_ids, upsert_metas)
+        bump_corpus_version({m.get("symbol", m.get("ticker")) for m in upsert_metas})
+
+    return len(upsert_ids)
+
+def backfill_llm_summaries(limit=5, batch_size=BACKFILL_BATCH_SIZE):
     collection = get_collection()
     llm=ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
     results = collection.get(
@@ -16,38 +120,35 @@ def backfill_llm_summaries(limit=5):
 
     if not ids:
         print("✅ No documents need LLM summarization.")
-        return
+        return {"documents": 0, "llm_calls": 0, "seconds": 0.0}
 
-    for doc_id, doc, meta in zip(ids, docs, metas):
-        title_line = [l for l in doc.splitlines() if l.startswith("Title:")]
-        title = title_line[0].replace("Title:", "").strip()
-
-        #print(f"🧠 Headline summarization: {title}")
-
-        summary = summarize_from_headline(
-            llm=llm,
-            title=title,
-            publisher=meta.get("publisher", "Unknown"),
-            date=meta.get("date", "")
-        )
-        #print("LLM SUMMARY in llm_backfill:", summary)
+    started = time.perf_counter()
 
-        if not summary:
-            print("⚠️ Empty LLM summary")
-            continue
+    items = []
+    by_id = {}
+    for doc_id, doc, meta in zip(ids, docs, metas):
+        item = build_backfill_item(doc_id, doc, meta)
+        items.append(item)
+        by_id[doc_id] = (item["title"], meta)
 
-        new_text = f"""
-Stock: {meta.get('symbol', meta.get('ticker', 'UNKNOWN'))}
-Title: {title}
-Summary: {summary}
-""".strip()
+    summaries, llm_calls = summarize_items(llm, items, batch_size=batch_size)
 
-        meta["summary_source"] = "llm_headline"
+    stored = store_backfilled_summaries(collection, summaries, by_id)
 
-        collection.upsert(
-            ids=[doc_id],
-            documents=[new_text],
-            metadatas=[meta]
-        )
+    empty = len(ids) - stored
+    if empty:
+        print(f"⚠️ {empty} empty LLM summaries")
 
-        print("✅ Headline summary stored")
+    seconds = time.perf_counter() - started
+    report = {
+        "documents": stored,
+        "llm_calls": llm_calls,
+        "seconds": round(seconds, 3),
+        "docs_per_second": round(stored / seconds, 2) if seconds else 0.0,
+        "docs_per_llm_call": round(stored / llm_calls, 2) if llm_calls else 0.0
+    }
+    print(
+        f"✅ {report['documents']} headline summaries stored in {report['seconds']}s "
+        f"({report['docs_per_second']} docs/s, {report['docs_per_llm_call']} docs/LLM call)"
+    )
+    return report
@@ -1,3 +1,4 @@
+import json
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 load_dotenv()
@@ -36,3 +37,68 @@ Write a concise 2–3 sentence summary focused on:
     summary =llm.invoke(prompt)
     #print("LLM SUMMARY:", summary.content.strip())
     return summary.content.strip()
+
+
+BATCH_SUMMARY_PROMPT = """
+You are a financial news analyst.
+
+Summarize EACH news item below STRICTLY based on its headline.
+Do NOT add information not implied by the headline.
+Do NOT speculate or invent details.
+If details are unclear, state them cautiously.
+
+For every item write a concise 2–3 sentence summary focused on:
+- What the news is about
+- Why it may matter to investors
+
+News items:
+{items}
+
+Return ONLY a JSON array, one object per item, in this exact form:
+[{{"id": "<item id>", "summary": "<summary>"}}]
+"""
+
+def _parse_batch_response(content: str, expected_ids) -> dict:
+    """
+    Pulls the JSON array out of the LLM reply and keeps only well-formed
+    entries for ids we asked about. Anything missing is left to the caller.
+    """
+    start, end = content.find("["), content.rfind("]")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        parsed = json.loads(content[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+
+    summaries = {}
+    for entry in parsed if isinstance(parsed, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        item_id = str(entry.get("id", "")).strip()
+        summary = entry.get("summary")
+        if item_id in expected_ids and isinstance(summary, str) and summary.strip():
+            summaries[item_id] = summary.strip()
+    return summaries
+
+def summarize_headlines_batch(llm, items) -> dict:
+    """
+    Headline-only summaries for several news items in ONE LLM call.
+
+    items: list of {"id", "title", "publisher", "date"}
+    Returns {id: summary} for the items the LLM answered validly;
+    callers should fall back to summarize_from_headline for the rest.
+    """
+    if not items:
+        return {}
+
+    # Short positional ids keep the prompt small and easy to echo back
+    short_ids = {str(i + 1): item["id"] for i, item in enumerate(items)}
+    listing = "\n".join(
+        f'[{i + 1}] Headline: "{item["title"]}" | Publisher: {item.get("publisher", "Unknown")} | Date: {item.get("date", "")}'
+        for i, item in enumerate(items)
+    )
+
+    response = llm.invoke(BATCH_SUMMARY_PROMPT.format(items=listing))
+    parsed = _parse_batch_response(response.content, short_ids.keys())
+    return {short_ids[k]: v for k, v in parsed.items()}
@@ -1,18 +1,56 @@
 import re
 import unicodedata
+from collections import Counter
 from difflib import SequenceMatcher
 
+TITLE_SIMILARITY_THRESHOLD = 0.85
+MIN_SUMMARY_CHARS = 40
+
+_WHITESPACE = re.compile(r"\s+")
+_NON_WORD = re.compile(r"[^\w\s]")
+
 def normalize(text: str) -> str:
-    text = unicodedata.normalize("NFKD", text)
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
     text = text.lower()
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"[^\w\s]", "", text)
+    text = _WHITESPACE.sub(" ", text)
+    text = _NON_WORD.sub("", text)
     return text.strip()
 
 
 def similarity(a: str, b: str) -> float:
     return SequenceMatcher(None, a, b).ratio()
 
+def similarity_exceeds(a: str, b: str, threshold=TITLE_SIMILARITY_THRESHOLD) -> bool:
+    """
+    Same answer as similarity(a, b) > threshold, without running
+    SequenceMatcher in the common cases:
+
+    - ratio = 2*M / (len(a)+len(b)) and M <= the shorter length, so very
+      different lengths can't pass;
+    - if the shorter string occurs inside the longer, M is exactly its
+      length (b under 200 chars, where difflib's autojunk is off);
+    - M <= the shared character multiset, so low character overlap can't pass.
+
+    Only what's left (near-threshold, reordered text) pays for difflib.
+    """
+    total = len(a) + len(b)
+    if not total:
+        return 1.0 > threshold
+
+    short, long_ = (a, b) if len(a) <= len(b) else (b, a)
+    upper = 2 * len(short) / total
+    if upper <= threshold:
+        return False
+    if len(b) < 200 and short in long_:
+        return upper > threshold
+
+    shared = sum((Counter(a) & Counter(b)).values())
+    if 2 * shared / total <= threshold:
+        return False
+
+    return similarity(a, b) > threshold
+
 def needs_llm_summary(title: str, summary: str) -> bool:
     if not summary:
         return True
@@ -23,14 +61,26 @@ def needs_llm_summary(title: str, summary: str) -> bool:
     # Remove trailing publisher words (last token heuristics)
     summary_n = summary_n.rsplit(" ", maxsplit=2)[0]
 
-    sim = similarity(title_n, summary_n)
-
     # If summary is basically title → bad
-    if sim > 0.85:
+    if similarity_exceeds(title_n, summary_n):
         return True
 
     # Too short to be meaningful
-    if len(summary_n) < 40:
+    if len(summary_n) < MIN_SUMMARY_CHARS:
         return True
 
     return False
+
+def needs_llm_summary_batch(entries):
+    """
+    needs_llm_summary for a whole feed: [(title, summary), ...] -> [bool, ...].
+    Repeated entries (syndicated copies) are scored once.
+    """
+    decisions = {}
+    results = []
+    for title, summary in entries:
+        key = (title, summary)
+        if key not in decisions:
+            decisions[key] = needs_llm_summary(title, summary)
+        results.append(decisions[key])
+    return results
@@ -0,0 +1,72 @@
+"""
+Stamps asset_type / market (from resolve_asset) onto documents already in
+stock_news_db. Older ingests left them out for some sources or hard-coded
+market "IN", which makes asset_type/market scope filters drop whole
+sources; run this once, then set ASSET_SCOPE_FILTERS=1.
+
+    python migrate_asset_fields.py
+
+Only metadata is rewritten (and the BM25 index re-synced), nothing is
+re-embedded.
+"""
+import time
+
+from vector_store import get_collection
+from bm25_index import get_bm25_index
+from ingestion.asset_resolver import resolve_asset
+
+MIGRATION_BATCH_SIZE = 500
+
+def migrate_asset_fields(batch_size=MIGRATION_BATCH_SIZE):
+    collection = get_collection()
+    started = time.perf_counter()
+    resolved = {}
+    scanned = updated = 0
+    offset = 0
+
+    while True:
+        page = collection.get(
+            limit=batch_size,
+            offset=offset,
+            include=["documents", "metadatas"]
+        )
+        ids = page["ids"]
+        if not ids:
+            break
+        offset += len(ids)
+        scanned += len(ids)
+
+        update_ids, update_docs, update_metas = [], [], []
+        for doc_id, doc, meta in zip(ids, page["documents"], page["metadatas"]):
+            meta = dict(meta or {})
+            symbol = meta.get("symbol", meta.get("ticker"))
+            if not symbol:
+                continue
+            if symbol not in resolved:
+                resolved[symbol] = resolve_asset(symbol)
+            asset = resolved[symbol]
+            if meta.get("asset_type") == asset["asset_type"] and meta.get("market") == asset["market"]:
+                continue
+            meta["asset_type"] = asset["asset_type"]
+            meta["market"] = asset["market"]
+            update_ids.append(doc_id)
+            update_docs.append(doc)
+            update_metas.append(meta)
+
+        if update_ids:
+            collection.update(ids=update_ids, metadatas=update_metas)
+            get_bm25_index().add_documents(update_ids, update_docs, update_metas)
+            updated += len(update_ids)
+
+    report = {
+        "scanned": scanned,
+        "updated": updated,
+        "symbols": len(resolved),
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+    print(f"✅ Asset fields: {updated}/{scanned} documents updated in {report['seconds']}s")
+    return report
+
+
+if __name__ == "__main__":
+    migrate_asset_fields()
@@ -0,0 +1,60 @@
+"""
+Backfills lexicon scores (lex_sentiment, lex_hedging, lex_performance,
+lex_version) into the metadata of documents already in stock_news_db.
+
+    python migrate_lexical_scores.py          # only missing/stale docs
+    python migrate_lexical_scores.py --all    # recompute everything
+
+Only metadata is rewritten, so nothing is re-embedded.
+"""
+import sys
+import time
+
+from vector_store import get_collection
+from lexicon import lexical_metadata, scores_from_metadata
+from multiquery import extract_summary
+
+MIGRATION_BATCH_SIZE = 500
+
+def migrate_lexical_scores(recompute_all=False, batch_size=MIGRATION_BATCH_SIZE):
+    collection = get_collection()
+    started = time.perf_counter()
+    scanned = updated = 0
+    offset = 0
+
+    while True:
+        page = collection.get(
+            limit=batch_size,
+            offset=offset,
+            include=["documents", "metadatas"]
+        )
+        ids = page["ids"]
+        if not ids:
+            break
+        offset += len(ids)
+        scanned += len(ids)
+
+        update_ids, update_metas = [], []
+        for doc_id, doc, meta in zip(ids, page["documents"], page["metadatas"]):
+            meta = dict(meta or {})
+            if not recompute_all and scores_from_metadata(meta) is not None:
+                continue
+            meta.update(lexical_metadata(extract_summary(doc or "")))
+            update_ids.append(doc_id)
+            update_metas.append(meta)
+
+        if update_ids:
+            collection.update(ids=update_ids, metadatas=update_metas)
+            updated += len(update_ids)
+
+    report = {
+        "scanned": scanned,
+        "updated": updated,
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+    print(f"✅ Lexicon scores: {updated}/{scanned} documents updated in {report['seconds']}s")
+    return report
+
+
+if __name__ == "__main__":
+    migrate_lexical_scores(recompute_all="--all" in sys.argv[1:])
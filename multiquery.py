@@ -1,6 +1,20 @@
+import asyncio
+import os
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from expansion_cache import (
+    get_expansion_cache,
+    expansion_key,
+    template_expansions,
+    fill_expansions
+)
+from lexicon import document_scores
+
+# asset_type/market scope filters need every stored doc to carry those
+# fields; enable after running migrate_asset_fields.py on older stores.
+ASSET_SCOPE_FILTERS = os.getenv("ASSET_SCOPE_FILTERS") == "1"
+
 # ==============================
 # LLM Multi-Query Prompt
 # ==============================
@@ -21,26 +35,6 @@ Return 4 to 6 short search queries.
 Each query should be on a new line.
 """
 
-# ==============================
-# Performance & Speculation Words
-# ==============================
-
-NEGATIVE_PERFORMANCE_WORDS = {
-    "slides", "falls", "fell", "drops", "declines",
-    "pressure", "jitters", "concerns", "uncertainty",
-    "scrutiny", "weakness", "selloff"
-}
-
-POSITIVE_PERFORMANCE_WORDS = {
-    "rises", "rose", "gains", "surges", "jumps",
-    "upgrades", "raises target", "bullish",
-    "strong", "optimism", "growth"
-}
-
-SPECULATIVE_WORDS = {
-    "could", "might", "may", "potential", "possibly", "ipo"
-}
-
 # ==============================
 # Intent Detection
 # ==============================
@@ -61,17 +55,62 @@ def detect_intent(query: str) -> str:
 # ==============================
 # LLM Multi-Query Generator
 # ==============================
-def generate_llm_multi_queries(query: str, llm, max_queries=5):
-    response = llm.invoke(
-        MULTI_QUERY_PROMPT.format(query=query)
-    )
+def generate_llm_multi_queries(query: str, llm, max_queries=5, ticker=None, use_cache=True):
+    """
+    Expands the query with the LLM. Expansions are cached on disk by
+    normalized query; when the ticker appears in the query the cache entry
+    is ticker-templated and shared by every ticker.
+    """
+    lines = _cached_expansions(query, ticker) if use_cache else None
+
+    if lines is None:
+        response = llm.invoke(
+            MULTI_QUERY_PROMPT.format(query=query)
+        )
+        lines = _parse_expansions(response.content)
+        if use_cache:
+            _store_expansions(query, ticker, lines)
+
+    return _finalize_queries(query, lines, max_queries)
+
+async def agenerate_llm_multi_queries(query: str, llm, max_queries=5, ticker=None, use_cache=True):
+    """
+    Async twin of generate_llm_multi_queries (awaits llm.ainvoke). The
+    expansion cache is SQLite, so it is read and written off the event loop.
+    """
+    lines = await asyncio.to_thread(_cached_expansions, query, ticker) if use_cache else None
 
-    lines = [
+    if lines is None:
+        response = await llm.ainvoke(
+            MULTI_QUERY_PROMPT.format(query=query)
+        )
+        lines = _parse_expansions(response.content)
+        if use_cache:
+            await asyncio.to_thread(_store_expansions, query, ticker, lines)
+
+    return _finalize_queries(query, lines, max_queries)
+
+def _cached_expansions(query, ticker):
+    key, templated = expansion_key(query, ticker)
+    cached = get_expansion_cache().get(key)
+    if cached is None:
+        return None
+    return fill_expansions(cached, ticker) if templated else cached
+
+def _store_expansions(query, ticker, lines):
+    key, templated = expansion_key(query, ticker)
+    to_store = template_expansions(lines, ticker) if templated else lines
+    if to_store:
+        get_expansion_cache().set(key, to_store)
+
+def _parse_expansions(content):
+    return [
         q.strip("-• ").strip()
-        for q in response.content.splitlines()
+        for q in content.splitlines()
         if len(q.strip()) > 10
     ]
 
+def _finalize_queries(query, lines, max_queries):
     queries = [query] + lines
 
     # Deduplicate & limit
@@ -90,10 +129,54 @@ def generate_llm_multi_queries(query: str, llm, max_queries=5):
 # ==============================
 # Retrieval per Query
 # ==============================
-def retrieve_multi_query_results(collection, queries, hours_lookback, n_results):
+def build_where_clause(cutoff, scope=None):
+    """
+    Chroma filter: timestamp >= cutoff, narrowed by an optional scope
+    {"symbols": [...], "asset_type": ..., "market": ...}.
+    """
+    conditions = [{"timestamp": {"$gte": cutoff}}]
+    if scope:
+        symbols = list(scope.get("symbols") or [])
+        if len(symbols) == 1:
+            conditions.append({"symbol": symbols[0]})
+        elif symbols:
+            conditions.append({"symbol": {"$in": symbols}})
+        for key in ("asset_type", "market"):
+            if ASSET_SCOPE_FILTERS and scope.get(key):
+                conditions.append({key: scope[key]})
+
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+def retrieve_multi_query_results(collection, queries, hours_lookback, n_results, batched=True, scope=None):
+    """
+    Returns one ranked list of docs/metas per query, in query order.
+
+    batched=True embeds every query variant in a single forward pass and
+    sends them as one multi-query search, so latency barely grows with
+    the number of expanded queries. batched=False keeps the old
+    one-search-per-query loop. scope filters are applied inside the
+    vector store (see build_where_clause).
+    """
     cutoff = (datetime.now() - timedelta(hours=hours_lookback)).timestamp()
 
-    where_clause = {"timestamp": {"$gte": cutoff}}
+    where_clause = build_where_clause(cutoff, scope)
+
+    if not queries:
+        return [], []
+
+    if batched:
+        results = collection.query(
+            query_texts=list(queries),
+            n_results=n_results,
+            where=where_clause
+        )
+
+        all_docs = results.get("documents") or [[] for _ in queries]
+        all_metas = results.get("metadatas") or [[] for _ in queries]
+
+        return list(all_docs), list(all_metas)
 
     all_docs = []
     all_metas = []
@@ -134,19 +217,11 @@ def extract_summary(doc: str) -> str:
 # ==============================
 # Intent-based Summary Scoring
 # ==============================
-def score_summary_for_intent(summary: str, intent: str) -> int:
-    text = summary.lower()
-    score = 0
-
+def score_summary_for_intent(summary: str, intent: str, meta=None) -> int:
+    """meta: document metadata; its stored lexicon scores are used when current."""
     if intent == "performance":
-        for w in POSITIVE_PERFORMANCE_WORDS:
-            score += text.count(w)
-        for w in NEGATIVE_PERFORMANCE_WORDS:
-            score -= text.count(w)
-        for w in SPECULATIVE_WORDS:
-            score -= text.count(w)
-
-    return score
+        return document_scores(summary, meta)["performance"]
+    return 0
 
 # ==============================
 # RRF Fusion Across Multi-Query + Intent
@@ -174,8 +249,7 @@ def rrf_multi_query_fusion(docs_per_query, metas_per_query, query, debug=False):
     intent_rank = sorted(
         doc_map.keys(),
         key=lambda d: score_summary_for_intent(
-            extract_summary(d),
-            detect_intent(query)
+            extract_summary(d), intent, meta_map[doc_map[d]]
         ),
         reverse=True
     )
@@ -0,0 +1,296 @@
+"""
+Cross-source near-duplicate detection at ingest.
+
+The same story arrives from Google News, MoneyControl and AlphaVantage
+under different URLs, so URL-based doc ids don't collapse it. Each news
+doc gets a 64-bit SimHash of its normalized title + summary; a doc within
+SIMHASH_MAX_DISTANCE bits of one already stored (same symbol, published
+close together) is merged into it as an extra source URL instead of being
+embedded again.
+
+Fingerprints persist in SQLite next to stock_news_db, split into four
+16-bit bands: two hashes within 3 bits always share at least one band,
+so candidates are found with indexed equality lookups.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+
+from answer_cache import bump_corpus_version
+from multiquery import extract_summary
+
+FINGERPRINT_INDEX_PATH = "./stock_news_fingerprints.sqlite3"
+SIMHASH_BITS = 64
+SIMHASH_MAX_DISTANCE = 3
+TITLE_WEIGHT = 8                          # headlines identify the story; summaries vary per source
+NEAR_DUPLICATE_WINDOW_SECONDS = 48 * 3600  # recurring headlines on other days are not duplicates
+SOURCE_URL_SEPARATOR = " "
+
+_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+# ===============================
+# Fingerprints
+# ===============================
+_PUBLISHER_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]{2,40}$")
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "").lower()
+    text = _NON_WORD.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+def _features(text, weight, features):
+    tokens = normalize_text(text).split()
+    for token in tokens:
+        features[token] += weight
+    for pair in zip(tokens, tokens[1:]):
+        features[" ".join(pair)] += weight
+
+def simhash(features) -> int:
+    vector = [0] * SIMHASH_BITS
+    for feature, weight in features.items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            vector[bit] += weight if h >> bit & 1 else -weight
+    return sum(1 << bit for bit, v in enumerate(vector) if v > 0)
+
+def fingerprint(title: str, summary: str = "") -> int:
+    # "Apple shares rise - Reuters" and "Apple shares rise" are the same story
+    title = _PUBLISHER_SUFFIX.sub("", title or "")
+    features = Counter()
+    _features(title, TITLE_WEIGHT, features)
+    _features(summary, 1, features)
+    return simhash(features)
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def _bands(fp):
+    return [(fp >> (i * _BAND_BITS)) & _BAND_MASK for i in range(_BANDS)]
+
+def _signed(fp):
+    # SQLite integers are signed 64-bit
+    return fp - (1 << 64) if fp >= 1 << 63 else fp
+
+def _unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+# ===============================
+# Persistent index
+# ===============================
+class FingerprintIndex:
+    def __init__(self, path=None):
+        self.path = path or FINGERPRINT_INDEX_PATH
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    doc_id TEXT PRIMARY KEY,
+                    symbol TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    fp INTEGER NOT NULL,
+                    b0 INTEGER NOT NULL, b1 INTEGER NOT NULL,
+                    b2 INTEGER NOT NULL, b3 INTEGER NOT NULL
+                )
+                """
+            )
+            for i in range(_BANDS):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS fp_b{i} ON fingerprints (symbol, b{i})")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def find(self, symbol, fp, timestamp=None):
+        """Closest stored doc id within SIMHASH_MAX_DISTANCE, or None."""
+        bands = _bands(fp)
+        clauses = " OR ".join(f"b{i} = ?" for i in range(_BANDS))
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT doc_id, fp, timestamp FROM fingerprints WHERE symbol = ? AND ({clauses})",
+                [symbol or ""] + bands
+            ).fetchall()
+
+        best, best_distance = None, SIMHASH_MAX_DISTANCE + 1
+        for doc_id, stored, stored_ts in rows:
+            if timestamp is not None and abs(stored_ts - timestamp) > NEAR_DUPLICATE_WINDOW_SECONDS:
+                continue
+            distance = hamming(fp, _unsigned(stored))
+            if distance < best_distance:
+                best, best_distance = doc_id, distance
+        return best
+
+    def add_documents(self, ids, metadatas):
+        """Indexes docs whose metadata carries a "fingerprint" (hex)."""
+        rows = []
+        for doc_id, meta in zip(ids, metadatas):
+            meta = meta or {}
+            if not meta.get("fingerprint"):
+                continue
+            fp = int(meta["fingerprint"], 16)
+            rows.append(
+                (doc_id, meta.get("symbol", meta.get("ticker")) or "", float(meta.get("timestamp", 0) or 0), _signed(fp))
+                + tuple(_bands(fp))
+            )
+        if not rows:
+            return
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (doc_id, symbol, timestamp, fp, b0, b1, b2, b3) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def remove(self, ids):
+        ids = list(ids)
+        removed = 0
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                removed += conn.execute(
+                    f"DELETE FROM fingerprints WHERE doc_id IN ({','.join('?' * len(chunk))})", chunk
+                ).rowcount
+        return removed
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()
+        return {"fingerprints": count, "path": self.path}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_fingerprint_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FingerprintIndex()
+    return _index
+
+# ===============================
+# Merging
+# ===============================
+def source_urls(meta):
+    """Every source URL of a (possibly merged) document."""
+    urls = (meta.get("source_urls") or "").split(SOURCE_URL_SEPARATOR)
+    urls = [u for u in urls if u]
+    return urls or [u for u in [meta.get("source_url")] if u]
+
+def _sources(meta):
+    return [s for s in (meta.get("sources") or meta.get("source", "")).split(", ") if s]
+
+def merge_sources(meta, other):
+    """
+    Adds other's URLs/sources (including any it had already absorbed) to
+    meta, in place. Returns True if anything changed.
+    """
+    urls = source_urls(meta)
+    new_urls = [u for u in source_urls(other) if u not in urls]
+    if not new_urls:
+        return False
+    meta["source_urls"] = SOURCE_URL_SEPARATOR.join(urls + new_urls)
+
+    sources = _sources(meta)
+    for source in _sources(other):
+        if source not in sources:
+            sources.append(source)
+    meta["sources"] = ", ".join(sources)
+    return True
+
+def _merge_into_batch(doc, symbol, fp, timestamp, batch):
+    """Folds doc into a kept batch doc telling the same story. Returns True if merged."""
+    meta = doc["metadata"]
+    for other_symbol, other_fp, other_ts, twin in batch:
+        if (
+            other_symbol == symbol
+            and abs(other_ts - timestamp) <= NEAR_DUPLICATE_WINDOW_SECONDS
+            and hamming(fp, other_fp) <= SIMHASH_MAX_DISTANCE
+        ):
+            # Keep whichever copy already has a usable summary
+            if twin["metadata"].get("summary_source") == "needs_llm" and meta.get("summary_source") != "needs_llm":
+                merge_sources(meta, twin["metadata"])
+                meta["fingerprint"] = twin["metadata"]["fingerprint"]
+                twin["id"], twin["text"], twin["metadata"] = doc["id"], doc["text"], meta
+            else:
+                merge_sources(twin["metadata"], meta)
+            return True
+    return False
+
+def collapse_near_duplicates(docs, collection, index=None):
+    """
+    Drops news docs that repeat a story already stored or earlier in the
+    batch, merging their URLs into the surviving doc. Surviving news docs
+    get a "fingerprint" metadata field.
+
+    Returns (kept_docs, merged_count).
+    """
+    index = index or get_fingerprint_index()
+    kept = []
+    batch = []                 # (symbol, fp, timestamp, doc) of kept news docs
+    stored_updates = {}        # canonical stored id -> [(symbol, fp, timestamp, doc)] to merge into it
+
+    for doc in docs:
+        meta = doc["metadata"]
+        if meta.get("content_type") != "news":
+            kept.append(doc)
+            continue
+
+        symbol = meta.get("symbol", meta.get("ticker")) or ""
+        timestamp = float(meta.get("timestamp", 0) or 0)
+        fp = fingerprint(meta.get("title", ""), extract_summary(doc["text"]))
+
+        if _merge_into_batch(doc, symbol, fp, timestamp, batch):
+            continue
+
+        meta["fingerprint"] = format(fp, "016x")
+        stored_id = index.find(symbol, fp, timestamp)
+        if stored_id is not None:
+            stored_updates.setdefault(stored_id, []).append((symbol, fp, timestamp, doc))
+            continue
+
+        batch.append((symbol, fp, timestamp, doc))
+        kept.append(doc)
+
+    if stored_updates:
+        found = collection.get(ids=list(stored_updates), include=["metadatas"])
+        update_ids, update_metas = [], []
+        for doc_id, stored_meta in zip(found["ids"], found["metadatas"]):
+            stored_meta = dict(stored_meta)
+            changed = False
+            for _, _, _, other in stored_updates.pop(doc_id):
+                changed = merge_sources(stored_meta, other["metadata"]) or changed
+            if changed:
+                update_ids.append(doc_id)
+                update_metas.append(stored_meta)
+        if update_ids:
+            collection.update(ids=update_ids, metadatas=update_metas)
+            # Cached answers list the sources; rebuild them with the new URLs
+            bump_corpus_version({m.get("symbol", m.get("ticker")) for m in update_metas})
+
+        # Fingerprints whose doc is gone from the store: forget them and keep
+        # one copy per story (orphans can still duplicate each other or the batch)
+        if stored_updates:
+            index.remove(list(stored_updates))
+            for orphans in stored_updates.values():
+                for symbol, fp, timestamp, doc in orphans:
+                    if _merge_into_batch(doc, symbol, fp, timestamp, batch):
+                        continue
+                    batch.append((symbol, fp, timestamp, doc))
+                    kept.append(doc)
+
+    return kept, len(docs) - len(kept)
@@ -0,0 +1,285 @@
+"""
+Time-partitioned storage for stock_news_db.
+
+Every retrieval filters on timestamp >= cutoff, but in one monolithic
+collection that filter runs over the whole history. With
+VECTOR_STORE_PARTITIONS=day|week, vector_store hands out a
+PartitionedCollection instead: documents are routed by their timestamp to
+one Chroma collection per day/week ("financial_news_week_20261012"),
+reads only touch the partitions overlapping the timestamp range of the
+where filter, and retention drops whole expired partitions.
+
+It implements the subset of the Chroma collection API this repo uses
+(upsert, update, get, query, delete, count), so callers don't change.
+Partitioning assumes a document's timestamp never changes, which holds
+for publish-time stamps.
+
+    python partitioned_collection.py    # copy the monolithic collection into partitions
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+
+from chromadb.errors import NotFoundError
+
+PARTITION_SPANS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+_EMPTY_GET = {"ids": [], "documents": [], "metadatas": []}
+
+
+def _partition_start(timestamp, granularity):
+    day = datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        day -= timedelta(days=day.weekday())
+    return day
+
+def _timestamp_bounds(where):
+    """(lower, upper) timestamp bounds implied by a where filter; None = unbounded."""
+    lower = upper = None
+    if not where:
+        return lower, upper
+    conditions = where["$and"] if "$and" in where else [where]
+    for condition in conditions:
+        value = condition.get("timestamp")
+        if not isinstance(value, dict):
+            continue
+        for op in ("$gte", "$gt"):
+            if op in value:
+                lower = value[op] if lower is None else max(lower, value[op])
+        for op in ("$lte", "$lt"):
+            if op in value:
+                upper = value[op] if upper is None else min(upper, value[op])
+    return lower, upper
+
+
+class PartitionedCollection:
+    def __init__(self, client, base_name, embedding_function, granularity="week"):
+        if granularity not in PARTITION_SPANS:
+            raise ValueError(f"Unknown partition granularity: {granularity}")
+        self.client = client
+        self.base_name = base_name
+        self.granularity = granularity
+        self._embedding_fn = embedding_function
+        self._lock = threading.Lock()
+        self._partitions = {}     # name -> (start, end, collection)
+        self._discover()
+
+    # ---------- partitions ----------
+    def _discover(self):
+        # Partitions written with another granularity stay readable
+        for collection in self.client.list_collections():
+            name = collection if isinstance(collection, str) else collection.name
+            prefix, _, stamp = name.rpartition("_")
+            for granularity, span in PARTITION_SPANS.items():
+                if prefix == f"{self.base_name}_{granularity}":
+                    start = datetime.strptime(stamp, "%Y%m%d").replace(tzinfo=timezone.utc)
+                    self._partitions[name] = (
+                        start,
+                        start + span,
+                        self.client.get_collection(name, embedding_function=self._embedding_fn)
+                    )
+
+    def _partition_for(self, timestamp):
+        start = _partition_start(timestamp, self.granularity)
+        name = f"{self.base_name}_{self.granularity}_{start:%Y%m%d}"
+        partition = self._partitions.get(name)
+        if partition is None:
+            with self._lock:
+                partition = self._partitions.get(name)
+                if partition is None:
+                    partition = self._partitions[name] = (
+                        start,
+                        start + PARTITION_SPANS[self.granularity],
+                        self.client.get_or_create_collection(name, embedding_function=self._embedding_fn)
+                    )
+        return partition[2]
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted(self._partitions.values(), key=lambda p: p[0])
+
+    def _overlapping(self, where=None):
+        """Partitions that can hold documents matching where, oldest first."""
+        lower, upper = _timestamp_bounds(where)
+        selected = []
+        for start, end, collection in self._snapshot():
+            if lower is not None and end.timestamp() <= lower:
+                continue
+            if upper is not None and start.timestamp() > upper:
+                continue
+            selected.append(collection)
+        return selected
+
+    @staticmethod
+    def _call(collection, method, **kwargs):
+        """collection.method(**kwargs), or None if the partition was dropped meanwhile."""
+        try:
+            return getattr(collection, method)(**kwargs)
+        except NotFoundError:
+            return None
+
+    def partitions_before(self, cutoff):
+        """Names of partitions whose whole time range is older than cutoff."""
+        with self._lock:
+            return sorted(name for name, (_, end, _) in self._partitions.items() if end.timestamp() <= cutoff)
+
+    def partition(self, name):
+        with self._lock:
+            return self._partitions[name][2]
+
+    def drop_partition(self, name):
+        with self._lock:
+            self._partitions.pop(name, None)
+            self.client.delete_collection(name)
+
+    def stats(self):
+        return {
+            "granularity": self.granularity,
+            "partitions": {p[2].name: self._call(p[2], "count") or 0 for p in self._snapshot()}
+        }
+
+    # ---------- collection API ----------
+    def count(self):
+        return sum(self._call(p[2], "count") or 0 for p in self._snapshot())
+
+    def upsert(self, ids, documents=None, metadatas=None, embeddings=None):
+        routed = {}
+        for i, meta in enumerate(metadatas):
+            timestamp = (meta or {}).get("timestamp")
+            if timestamp is None:
+                timestamp = datetime.now(timezone.utc).timestamp()
+            collection = self._partition_for(float(timestamp))
+            routed.setdefault(collection.name, (collection, []))[1].append(i)
+
+        for collection, rows in routed.values():
+            collection.upsert(
+                ids=[ids[i] for i in rows],
+                documents=[documents[i] for i in rows] if documents is not None else None,
+                metadatas=[metadatas[i] for i in rows],
+                embeddings=[embeddings[i] for i in rows] if embeddings is not None else None
+            )
+
+    def _locate(self, ids):
+        located = []
+        for collection in self._overlapping():
+            page = self._call(collection, "get", ids=ids, include=[])
+            if page and page["ids"]:
+                located.append((collection, set(page["ids"])))
+        return located
+
+    def update(self, ids, metadatas=None, documents=None):
+        ids = list(ids)
+        position = {doc_id: i for i, doc_id in enumerate(ids)}
+        for collection, found in self._locate(ids):
+            rows = [position[doc_id] for doc_id in ids if doc_id in found]
+            self._call(
+                collection,
+                "update",
+                ids=[ids[i] for i in rows],
+                metadatas=[metadatas[i] for i in rows] if metadatas is not None else None,
+                documents=[documents[i] for i in rows] if documents is not None else None
+            )
+
+    def delete(self, ids=None, where=None):
+        if ids is not None:
+            for collection, found in self._locate(list(ids)):
+                self._call(collection, "delete", ids=list(found))
+            return
+        for collection in self._overlapping(where):
+            self._call(collection, "delete", where=where)
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("metadatas", "documents")):
+        include = list(include)
+        result = {key: [] for key in _EMPTY_GET}
+        skip = offset or 0
+        for collection in self._overlapping(where):
+            if limit is not None and len(result["ids"]) >= limit:
+                break
+            if skip and ids is None and where is None:
+                # Skip whole partitions without reading them
+                size = self._call(collection, "count") or 0
+                if skip >= size:
+                    skip -= size
+                    continue
+            want = None if limit is None else limit - len(result["ids"]) + skip
+            page = self._call(collection, "get", ids=ids, where=where, limit=want, include=include)
+            if page is None:
+                continue
+            for key in _EMPTY_GET:
+                values = page.get(key) if key == "ids" or key in include else None
+                result[key].extend((values or [])[skip:])
+            skip = max(0, skip - len(page["ids"]))
+
+        for key in ("documents", "metadatas"):
+            if key not in include:
+                result[key] = None
+        return result
+
+    def query(self, query_texts, n_results=10, where=None, include=("metadatas", "documents", "distances")):
+        """Queries the overlapping partitions and merges each query's hits by distance."""
+        query_texts = list(query_texts)
+        include = list(set(include) | {"distances"})
+        # Embed once instead of once per partition
+        embeddings = self._embedding_fn(query_texts)
+
+        merged = [[] for _ in query_texts]
+        for collection in self._overlapping(where):
+            if not self._call(collection, "count"):
+                continue
+            results = self._call(
+                collection,
+                "query",
+                query_embeddings=embeddings,
+                n_results=n_results,
+                where=where,
+                include=include
+            )
+            if results is None:
+                continue
+            for q in range(len(query_texts)):
+                for j, doc_id in enumerate(results["ids"][q]):
+                    merged[q].append((
+                        results["distances"][q][j],
+                        doc_id,
+                        results["documents"][q][j] if results.get("documents") else None,
+                        results["metadatas"][q][j] if results.get("metadatas") else None
+                    ))
+
+        output = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for hits in merged:
+            hits = sorted(hits, key=lambda h: h[0])[:n_results]
+            output["distances"].append([h[0] for h in hits])
+            output["ids"].append([h[1] for h in hits])
+            output["documents"].append([h[2] for h in hits])
+            output["metadatas"].append([h[3] for h in hits])
+        return output
+
+
+def migrate_to_partitions(source, target, batch_size=500):
+    """Copies every document (with its stored embedding) from source into target."""
+    copied = 0
+    while True:
+        page = source.get(limit=batch_size, offset=copied, include=["documents", "metadatas", "embeddings"])
+        if not len(page["ids"]):
+            break
+        target.upsert(
+            ids=page["ids"],
+            documents=page["documents"],
+            metadatas=page["metadatas"],
+            embeddings=page["embeddings"]
+        )
+        copied += len(page["ids"])
+    return copied
+
+
+if __name__ == "__main__":
+    from vector_store import COLLECTION_NAME, PARTITION_GRANULARITY, get_runtime
+    runtime = get_runtime()
+    source = runtime.client.get_collection(COLLECTION_NAME, embedding_function=runtime.embedding_function)
+    target = PartitionedCollection(
+        runtime.client, COLLECTION_NAME, runtime.embedding_function, PARTITION_GRANULARITY or "week"
+    )
+    count = migrate_to_partitions(source, target)
+    print(f"✅ Copied {count} documents into {len(target.stats()['partitions'])} partitions")
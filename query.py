@@ -1,20 +1,36 @@
+import asyncio
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import datetime, timedelta
 from typing import List
 from dotenv import load_dotenv
 
 from vector_store import get_collection
+from answer_cache import answer_cache, make_answer_key
+from lexicon import document_scores, scan_texts, sum_scores
+from bm25_index import retrieve_bm25_results
+from query_entities import detect_query_symbols
+from near_duplicates import source_urls
 
 # 🔹 IMPORT FROM MULTI-QUERY MODULE
 from multiquery import (
     generate_llm_multi_queries,
+    agenerate_llm_multi_queries,
     retrieve_multi_query_results,
     rrf_multi_query_fusion,
     extract_summary
 )
-from ingestion.stock_details import fetch_stock_details
+from ingestion.stock_details import get_stock_details
 
 load_dotenv()
 
+# Embedding + vector search are CPU-bound; they get a small dedicated pool so
+# concurrent async requests queue on real cores instead of spawning threads.
+QUERY_CPU_WORKERS = 4
+_cpu_executor = ThreadPoolExecutor(max_workers=QUERY_CPU_WORKERS, thread_name_prefix="query-cpu")
+
 # ===============================
 # Prompt (hallucination-safe)
 # ===============================
@@ -39,48 +55,21 @@ Rules:
 Final Answer:
 """
 
-# ===============================
-# Sentiment Weights
-# ===============================
-NEGATIVE_WEIGHTS = {
-    "slides": 2, "falls": 2, "fell": 2, "drops": 2,
-    "declines": 2, "pressure": 1, "concerns": 1,
-    "uncertainty": 1, "scrutiny": 1, "weakness": 1,
-    "selloff": 3
-}
-
-POSITIVE_WEIGHTS = {
-    "rises": 2, "rose": 2, "gains": 2, "surges": 3,
-    "jumps": 2, "upgrades": 3, "raises target": 3,
-    "bullish": 2, "strong": 1, "growth": 1,
-    "optimism": 1
-}
-
-HEDGING_WORDS = {"could", "might", "may", "potential", "possibly"}
-
 # ===============================
 # Sentiment + Confidence
 # ===============================
 def score_sentiment(summaries):
-    score = 0
-    for s in summaries:
-        text = s.lower()
-        for w, wt in POSITIVE_WEIGHTS.items():
-            score += wt * text.count(w)
-        for w, wt in NEGATIVE_WEIGHTS.items():
-            score -= wt * text.count(w)
-    return score
+    return scan_texts(summaries)["sentiment"]
 
 def hedging_penalty(summaries):
-    return sum(
-        s.lower().count(w)
-        for s in summaries
-        for w in HEDGING_WORDS
-    )
-
-def infer_sentiment_and_confidence(summaries):
-    sentiment_score = score_sentiment(summaries)
-    hedge_penalty = hedging_penalty(summaries)
+    return scan_texts(summaries)["hedging"]
+
+def infer_sentiment_and_confidence(summaries, scores=None):
+    """scores: precomputed lexicon totals for the summaries (scanned if None)."""
+    if scores is None:
+        scores = scan_texts(summaries)
+    sentiment_score = scores["sentiment"]
+    hedge_penalty = scores["hedging"]
     effective_score = abs(sentiment_score) - hedge_penalty
 
     if sentiment_score >= 3:
@@ -102,6 +91,10 @@ def infer_sentiment_and_confidence(summaries):
 # ===============================
 # Evidence helpers
 # ===============================
+def _links(meta):
+    """Every source URL of a doc, including those of merged near-duplicates."""
+    return source_urls(meta) or [u for u in [meta.get("url")] if u]
+
 def extract_key_evidence_with_links(docs, metas, max_points=3):
     evidence = []
     seen = set()
@@ -111,19 +104,21 @@ def extract_key_evidence_with_links(docs, metas, max_points=3):
             break
 
         summary = extract_summary(doc)
-        link = meta.get("source_url", meta.get("url", ""))
+        links = _links(meta)
 
         if summary and summary not in seen:
-            evidence.append((summary, link))
+            evidence.append((summary, links))
             seen.add(summary)
 
     return evidence
 
 def build_evidence_html(evidence):
+    def anchors(links):
+        return " ".join(f"<a href=\"{l}\" target=\"_blank\">Read article</a>" for l in links)
+
     return "<br><br>".join(
-        f"• {s}<br>&nbsp;&nbsp;🔗 <a href=\"{l}\" target=\"_blank\">Read article</a>"
-        if l else f"• {s}"
-        for s, l in evidence
+        f"• {s}<br>&nbsp;&nbsp;🔗 {anchors(links)}" if links else f"• {s}"
+        for s, links in evidence
     )
 
 # ===============================
@@ -146,29 +141,42 @@ Recent News Summaries:
 # ===============================
 # CORE QUERY PIPELINE
 # ===============================
-def answer_user_query_internal(
-    query: str,
-
-    llm,
-    hours_lookback: int = 48,
-    n_results: int = 5,
-    ticker: str = None
-):
-    collection = get_collection()
+def build_real_time_context(details) -> str:
+    if not details:
+        return ""
+    return f"""
+REAL-TIME MARKET DATA (Use this for precise numbers):
+Price: {details.get('price')} {details.get('currency')}
+Change: {details.get('change'):.2f} ({details.get('change_percent'):.2f}%)
+Day Range: Low {details.get('low')} - High {details.get('high')}
+Volume: {details.get('volume')}
+PE Ratio: {details.get('pe_ratio')}
+ROE: {details.get('roe')}
+Market Cap: {details.get('market_cap')}
+""".strip()
 
-    #  Multi-query expansion
-    queries = generate_llm_multi_queries(query, llm)
+def format_news_list(metas, limit=5):
+    news = []
+    for m in metas[:limit]:  # Limit to top 5 live news items
+        links = _links(m)
+        news.append({
+            "title": m.get("title", ""),
+            "url": links[0] if links else "",
+            "urls": links,
+            "timestamp": m.get("date", ""),
+            "source": m.get("sources") or m.get("source", "")
+        })
+    return news
 
-    #  Retrieval
-    docs_per_query, metas_per_query = retrieve_multi_query_results(
-        collection=collection,
-        queries=queries,
-        hours_lookback=hours_lookback,
-        n_results=n_results
-    )
+def fuse_retrieved(query: str, docs_per_query, metas_per_query):
+    """
+    RRF fusion, sentiment and evidence over per-query retrieval results.
 
+    Returns (prepared, summaries). prepared["answer"] is already set when
+    there is not enough data to ask the LLM.
+    """
     if not any(docs_per_query):
-        return "There is insufficient recent information to answer this question.", "Neutral", "Low", [], []
+        return _no_answer("There is insufficient recent information to answer this question."), []
 
     #  RRF fusion
     fused_docs, fused_metas = rrf_multi_query_fusion(
@@ -178,63 +186,273 @@ def answer_user_query_internal(
         debug=False
     )
 
-    summaries = [extract_summary(d) for d in fused_docs if extract_summary(d)]
+    with_summary = [(extract_summary(d), m) for d, m in zip(fused_docs, fused_metas)]
+    with_summary = [(s, m) for s, m in with_summary if s]
+    summaries = [s for s, _ in with_summary]
     if not summaries:
-        return "Recent news coverage does not provide enough detail to assess this.", "Neutral", "Low", [], []
+        return _no_answer("Recent news coverage does not provide enough detail to assess this."), []
 
-    #  Sentiment & confidence
-    sentiment, confidence = infer_sentiment_and_confidence(summaries)
+    #  Sentiment & confidence (lexicon scores stored at ingestion)
+    scores = sum_scores(document_scores(s, m) for s, m in with_summary)
+    sentiment, confidence = infer_sentiment_and_confidence(summaries, scores)
 
     #  Evidence
     evidence = extract_key_evidence_with_links(fused_docs, fused_metas)
-    evidence_html = build_evidence_html(evidence)
 
-    #  Answer generation
+    prepared = {
+        "answer": None,
+        "prompt": None,
+        "sentiment": sentiment,
+        "confidence": confidence,
+        # Format evidence for API response
+        "evidence": [
+            {"summary": s, "source_url": links[0] if links else "", "source_urls": links}
+            for s, links in evidence
+        ],
+        "news": format_news_list(fused_metas)
+    }
+    return prepared, summaries
+
+def build_answer_prompt(query: str, summaries, ticker: str = None, details=None) -> str:
     real_time_context = ""
     if ticker:
         print(f"   📊 Injecting Real-Time Data for {ticker}...")
-        details = fetch_stock_details(ticker)
-        if details:
-             real_time_context = f"""
-REAL-TIME MARKET DATA (Use this for precise numbers):
-Price: {details.get('price')} {details.get('currency')}
-Change: {details.get('change'):.2f} ({details.get('change_percent'):.2f}%)
-Day Range: Low {details.get('low')} - High {details.get('high')}
-Volume: {details.get('volume')}
-PE Ratio: {details.get('pe_ratio')}
-ROE: {details.get('roe')}
-Market Cap: {details.get('market_cap')}
-""".strip()
+        real_time_context = build_real_time_context(details)
 
     context = build_answer_context(query, summaries, real_time_context)
-    # Pass empty real_time_context to prompt structure if used there too, or just rely on context builder
-    response = llm.invoke(ANSWER_PROMPT.format(context=context, real_time_context="")) # real_time_context is already inside 'context' via builder
+    # real_time_context is already inside 'context' via builder
+    return ANSWER_PROMPT.format(context=context, real_time_context="")
 
+# ===============================
+# Stage graph
+# ===============================
+# quote ───────────────────────────────┐
+# raw-query retrieval ─────────────────┤
+# BM25 retrieval ──────────────────────┼─> fusion -> prompt
+# expansion (LLM) -> expanded retrieval┘
+#
+# The quote, the original query's retrieval and the BM25 lookup do not
+# depend on the LLM expansion, so they start immediately; latency is the
+# longest branch rather than the sum of stages.
+
+# Queries searched densely: the original plus the LLM expansions. BM25 is
+# an extra retrieval list on top of these, not a replacement for any.
+DENSE_QUERY_VARIANTS = 5
+
+class StageTimer:
+    """Collects per-stage wall-clock seconds for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+
+    def timed(self, name, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.timings[name] = round(time.perf_counter() - started, 3)
+
+    async def atimed(self, name, awaitable):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.timings[name] = round(time.perf_counter() - started, 3)
+
+    def finish(self):
+        self.timings["total"] = round(time.perf_counter() - self.started, 3)
+        stages = ", ".join(f"{k}={v:.2f}s" for k, v in self.timings.items())
+        print(f"   ⏱️ Stages: {stages}")
+        return dict(self.timings)
+
+def _merge_retrievals(*retrievals):
+    docs_per_query, metas_per_query = [], []
+    for docs, metas in retrievals:
+        docs_per_query += docs
+        metas_per_query += metas
+    return docs_per_query, metas_per_query
+
+def resolve_retrieval_scope(query: str, ticker: str = None, asset_type: str = None, market: str = None):
+    """
+    Filters pushed into the vector store and BM25 search: the explicit
+    ticker, otherwise watchlist symbols/companies named in the question.
+    None means search everything.
+    """
+    symbols = [ticker.upper()] if ticker else detect_query_symbols(query)
+    scope = {}
+    if symbols:
+        scope["symbols"] = symbols
+    if asset_type:
+        scope["asset_type"] = asset_type
+    if market:
+        scope["market"] = market.upper()
+    if scope:
+        print(f"   🎯 Retrieval scope: {scope}")
+    return scope or None
+
+async def _run_cpu(fn, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(_cpu_executor, partial(fn, *args, **kwargs))
+
+async def _prepare_stages(query: str, expand, hours_lookback, n_results, ticker, asset_type, market):
+    """
+    Runs the stage graph. expand() returns an awaitable of the expanded
+    query list; it is the only stage where the sync and async entry
+    points differ (llm.invoke vs llm.ainvoke). Embedding + vector search
+    run on the bounded CPU pool, the quote fetch (blocking yfinance I/O)
+    in a worker thread.
+    """
+    timer = StageTimer()
+    # Watchlist file + asset registry lookups: keep them off the event loop
+    scope = await asyncio.to_thread(resolve_retrieval_scope, query, ticker, asset_type, market)
+    collection = await _run_cpu(get_collection)
+
+    quote = None
+    if ticker:
+        quote = asyncio.ensure_future(
+            timer.atimed("quote", asyncio.to_thread(get_stock_details, ticker))
+        )
+    raw = asyncio.ensure_future(timer.atimed(
+        "raw_retrieval",
+        _run_cpu(retrieve_multi_query_results, collection, [query], hours_lookback, n_results, scope=scope)
+    ))
+    lexical = asyncio.ensure_future(timer.atimed(
+        "bm25_retrieval",
+        _run_cpu(retrieve_bm25_results, collection, query, hours_lookback, n_results, scope=scope)
+    ))
+
+    async def expand_and_retrieve():
+        #  Multi-query expansion (critical path)
+        queries = await timer.atimed("expansion", expand())
+        #  Retrieval of the expanded variants only; the original is in flight
+        return await timer.atimed(
+            "expanded_retrieval",
+            _run_cpu(retrieve_multi_query_results, collection, queries[1:], hours_lookback, n_results, scope=scope)
+        )
+
+    try:
+        raw_result, lexical_result, expanded = await asyncio.gather(raw, lexical, expand_and_retrieve())
+        docs_per_query, metas_per_query = _merge_retrievals(raw_result, expanded, lexical_result)
+
+        prepared, summaries = await timer.atimed(
+            "fusion", _run_cpu(fuse_retrieved, query, docs_per_query, metas_per_query)
+        )
+        if prepared["answer"] is None:
+            #  Answer prompt
+            details = await quote if quote else None
+            prepared["prompt"] = build_answer_prompt(query, summaries, ticker, details)
+    finally:
+        # Don't hold the response for a quote we no longer need
+        if quote and not quote.done():
+            quote.cancel()
+        for task in (raw, lexical):
+            if not task.done():
+                task.cancel()
+
+    prepared["timings"] = timer.finish()
+    return prepared
+
+def prepare_answer(
+    query: str,
+    llm,
+    hours_lookback: int = 48,
+    n_results: int = 5,
+    ticker: str = None,
+    asset_type: str = None,
+    market: str = None
+):
+    """
+    Everything up to (but not including) the answer LLM call.
 
-    # Format evidence for API response
-    evidence_list = [
-        {"summary": s, "source_url": l}
-        for s, l in evidence
-    ]
+    Returns a dict with sentiment, confidence, evidence and news ready for
+    the API, plus either the answer "prompt" to send to the LLM, or a
+    fallback "answer" when there is not enough data (prompt is None).
+    "timings" holds per-stage seconds.
+    """
+    def expand():
+        return asyncio.to_thread(generate_llm_multi_queries, query, llm, DENSE_QUERY_VARIANTS, ticker)
 
-    # Format news for API response
-    news_list = [
-        {
-            "title": m.get("title", ""),
-            "url": m.get("source_url", m.get("url", "")),
-            "timestamp": m.get("date", ""),
-            "source": m.get("source", "")
-        }
-        for m in fused_metas
-    ][:5]  # Limit to top 5 live news items
-
-    return (
-        response.content.strip(),
-        sentiment,
-        confidence,
-        evidence_list,
-        news_list
-    )
+    return asyncio.run(_prepare_stages(query, expand, hours_lookback, n_results, ticker, asset_type, market))
+
+async def prepare_answer_async(
+    query: str,
+    llm,
+    hours_lookback: int = 48,
+    n_results: int = 5,
+    ticker: str = None,
+    asset_type: str = None,
+    market: str = None
+):
+    """Async prepare_answer: same stages, the LLM expansion is awaited."""
+    def expand():
+        return agenerate_llm_multi_queries(query, llm, max_queries=DENSE_QUERY_VARIANTS, ticker=ticker)
+
+    return await _prepare_stages(query, expand, hours_lookback, n_results, ticker, asset_type, market)
+
+def _no_answer(message):
+    return {
+        "answer": message,
+        "prompt": None,
+        "sentiment": "Neutral",
+        "confidence": "Low",
+        "evidence": [],
+        "news": []
+    }
+
+# ===============================
+# Entry points
+# ===============================
+RESULT_FIELDS = ("sentiment", "confidence", "evidence", "news")
+
+def _generate(llm, prepared):
+    """The answer: the fallback when there was not enough data, else the LLM's."""
+    if prepared["prompt"] is None:
+        return prepared["answer"]
+    #  Answer generation
+    return llm.invoke(prepared["prompt"]).content.strip()
+
+async def _agenerate(llm, prepared):
+    if prepared["prompt"] is None:
+        return prepared["answer"]
+    return (await llm.ainvoke(prepared["prompt"])).content.strip()
+
+def _cached_result(query, hours_lookback, n_results, ticker, asset_type, market):
+    """(answer cache key, copy of the cached result or None)."""
+    cache_key = make_answer_key(query, ticker, hours_lookback, n_results, asset_type, market)
+    cached = answer_cache.get(cache_key)
+    return cache_key, (copy.deepcopy(cached) if cached is not None else None)
+
+def _store_result(cache_key, prepared, answer):
+    """API result dict for a prepared answer; cached under cache_key."""
+    result = {"answer": answer, **{k: prepared[k] for k in RESULT_FIELDS}}
+    answer_cache.set(cache_key, copy.deepcopy(result))
+    return result
+
+def answer_user_query_internal(
+    query: str,
+
+    llm,
+    hours_lookback: int = 48,
+    n_results: int = 5,
+    ticker: str = None,
+    asset_type: str = None,
+    market: str = None
+):
+    prepared = prepare_answer(query, llm, hours_lookback, n_results, ticker, asset_type, market)
+    return (_generate(llm, prepared), *(prepared[k] for k in RESULT_FIELDS))
+
+async def answer_user_query_internal_async(
+    query: str,
+    llm,
+    hours_lookback: int = 48,
+    n_results: int = 5,
+    ticker: str = None,
+    asset_type: str = None,
+    market: str = None
+):
+    """Async answer_user_query_internal; same 5-tuple result."""
+    prepared = await prepare_answer_async(query, llm, hours_lookback, n_results, ticker, asset_type, market)
+    return (await _agenerate(llm, prepared), *(prepared[k] for k in RESULT_FIELDS))
 
 def answer_user_query(
     query: str,
@@ -247,7 +465,7 @@ def answer_user_query(
         query, llm, hours_lookback, n_results
     )
     
-    evidence_html = build_evidence_html([(e["summary"], e["source_url"]) for e in evidence])
+    evidence_html = build_evidence_html([(e["summary"], e["source_urls"]) for e in evidence])
     
     return f"""{answer}
 
@@ -258,32 +476,84 @@ Key evidence:
 {evidence_html}
 """
 
+def _default_llm():
+    from langchain_groq import ChatGroq
+    
+    # Initialize LLM (Gemini)
+    
+    return ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
+
 def answer_user_query_json(
     query: str,
     hours_lookback: int = 48,
     n_results: int = 5,
-    ticker: str = None
+    ticker: str = None,
+    asset_type: str = None,
+    market: str = None
 ):
-    from langchain_groq import ChatGroq
-    
-    # Initialize LLM (Gemini)
-    
-    llm=ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
+    cache_key, cached = _cached_result(query, hours_lookback, n_results, ticker, asset_type, market)
+    if cached is not None:
+        return cached
 
+    llm = _default_llm()
+    prepared = prepare_answer(query, llm, hours_lookback, n_results, ticker, asset_type, market)
+    return _store_result(cache_key, prepared, _generate(llm, prepared))
 
-    # Use internal pipeline
-    answer_text, sentiment, confidence, evidence, news = answer_user_query_internal(
-        query=query,
-        llm=llm,
-        hours_lookback=hours_lookback,
-        n_results=n_results,
-        ticker=ticker
-    )
+async def answer_user_query_json_async(
+    query: str,
+    hours_lookback: int = 48,
+    n_results: int = 5,
+    ticker: str = None,
+    asset_type: str = None,
+    market: str = None
+):
+    """Async answer_user_query_json, used by the API handlers."""
+    cache_key, cached = _cached_result(query, hours_lookback, n_results, ticker, asset_type, market)
+    if cached is not None:
+        return cached
 
-    return {
-        "answer": answer_text,
-        "sentiment": sentiment,
-        "confidence": confidence,
-        "evidence": evidence,
-        "news": news
-    }
+    llm = _default_llm()
+    prepared = await prepare_answer_async(query, llm, hours_lookback, n_results, ticker, asset_type, market)
+    return _store_result(cache_key, prepared, await _agenerate(llm, prepared))
+
+async def astream_user_query_json(
+    query: str,
+    hours_lookback: int = 48,
+    n_results: int = 5,
+    ticker: str = None,
+    asset_type: str = None,
+    market: str = None
+):
+    """
+    Streaming variant of answer_user_query_json_async. Yields (event, data):
+
+    - ("meta",  {sentiment, confidence, evidence, news}) once retrieval and fusion finish
+    - ("token", {"text": ...}) for each answer chunk as the LLM produces it
+    - ("done",  full result dict, same shape as answer_user_query_json)
+    """
+    cache_key, cached = _cached_result(query, hours_lookback, n_results, ticker, asset_type, market)
+    if cached is not None:
+        yield "meta", {k: cached[k] for k in RESULT_FIELDS}
+        yield "token", {"text": cached["answer"]}
+        yield "done", cached
+        return
+
+    llm = _default_llm()
+    prepared = await prepare_answer_async(query, llm, hours_lookback, n_results, ticker, asset_type, market)
+
+    meta = {k: prepared[k] for k in RESULT_FIELDS}
+    meta["timings"] = prepared["timings"]
+    yield "meta", meta
+
+    if prepared["prompt"] is None:
+        answer = prepared["answer"]
+        yield "token", {"text": answer}
+    else:
+        parts = []
+        async for chunk in llm.astream(prepared["prompt"]):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield "token", {"text": chunk.content}
+        answer = "".join(parts).strip()
+
+    yield "done", _store_result(cache_key, prepared, answer)
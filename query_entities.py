@@ -0,0 +1,89 @@
+"""
+Query-side entity recognition: which watchlist assets a question is about.
+
+Used to scope retrieval when the caller gives no ticker, so "why did Apple
+fall?" searches AAPL's news instead of the whole store.
+"""
+import re
+
+from ingestion import asset_registry
+from watchlist import read_watchlist
+
+# Common names that differ from the ticker or that the registry may not
+# have yet; only used for symbols that are on the watchlist
+COMPANY_ALIASES = {
+    "apple": "AAPL",
+    "alphabet": "GOOGL",
+    "google": "GOOGL",
+    "microsoft": "MSFT",
+    "amazon": "AMZN",
+    "tesla": "TSLA",
+    "nvidia": "NVDA",
+    "netflix": "NFLX",
+    "reliance": "RELIANCE",
+    "infosys": "INFY",
+    "tata consultancy": "TCS",
+    "hdfc bank": "HDFCBANK",
+    "gold": "GOLD",
+    "silver": "SILVER",
+    "crude": "CRUDE",
+}
+
+# Symbols that are also ordinary words only count when written in capitals
+COMMON_WORDS = {
+    "a", "all", "am", "an", "are", "at", "be", "big", "by", "can", "for",
+    "go", "good", "has", "i", "in", "is", "it", "key", "low", "now", "on",
+    "one", "or", "out", "pm", "so", "the", "to", "up", "us", "well", "win"
+}
+
+_CORPORATE_SUFFIXES = re.compile(
+    r"\b(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|holdings|group|class [a-z])\b\.?"
+)
+
+def _name_aliases(name: str):
+    """'Reliance Industries Limited' -> {'reliance industries', 'reliance'}"""
+    base = _CORPORATE_SUFFIXES.sub(" ", name.lower().replace(",", " "))
+    base = re.sub(r"[^a-z0-9&\s]", " ", base)
+    base = re.sub(r"\s+", " ", base).strip()
+    if not base:
+        return set()
+    aliases = {base}
+    first = base.split()[0]
+    if len(first) >= 4 and first not in COMMON_WORDS:
+        aliases.add(first)
+    return aliases
+
+def _contains(text, phrase):
+    return re.search(rf"(?<![\w&]){re.escape(phrase)}(?![\w&])", text) is not None
+
+def detect_query_symbols(question: str, watchlist=None):
+    """Watchlist symbols mentioned in the question by ticker or company name."""
+    watchlist = [s.upper() for s in (watchlist if watchlist is not None else read_watchlist())]
+    if not question or not watchlist:
+        return []
+
+    found = set()
+
+    # ---- Tickers ----
+    for symbol in watchlist:
+        for match in re.finditer(rf"(?<![\w&]){re.escape(symbol)}(?![\w&])", question, re.IGNORECASE):
+            if match.group(0).isupper() or symbol.lower() not in COMMON_WORDS:
+                found.add(symbol)
+                break
+
+    # ---- Company names ----
+    text = question.lower()
+    aliases = {}
+    for alias, symbol in COMPANY_ALIASES.items():
+        aliases.setdefault(alias, set()).add(symbol)
+    for symbol, name in asset_registry.names_for(watchlist).items():
+        for alias in _name_aliases(name):
+            aliases.setdefault(alias, set()).add(symbol)
+
+    for alias, symbols in aliases.items():
+        symbols = symbols & set(watchlist)
+        # An alias shared by several watchlist names ("tata") is ambiguous
+        if len(symbols) == 1 and _contains(text, alias):
+            found |= symbols
+
+    return [s for s in watchlist if s in found]
@@ -0,0 +1,253 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from ingestion.asset_resolver import resolve_asset
+
+# ===============================
+# Freshness policy
+# ===============================
+# How long an ingest stays "fresh" per asset type before the ticker is
+# refreshed again. Equities move with news flow, macro assets less so.
+FRESHNESS_TTL_SECONDS = {
+    "equity": 30 * 60,
+    "index": 30 * 60,
+    "commodity": 60 * 60,
+    "forex": 60 * 60,
+}
+DEFAULT_TTL_SECONDS = 30 * 60
+
+STATE_FILE = "refresh_state.json"
+POLL_INTERVAL_SECONDS = 60
+
+
+class RefreshScheduler:
+    """
+    Background refresher for watchlist tickers.
+
+    - Remembers when each ticker was last ingested (persisted to STATE_FILE).
+    - Only queues tickers whose last ingest is older than their asset type TTL.
+    - A ticker that is already queued or running is never queued twice, so
+      many dashboard loads collapse into a single ingest.
+    - Every poll interval it re-checks the watchlist and refreshes what went stale.
+    """
+
+    def __init__(
+        self,
+        ingest_fn,
+        watchlist_fn=None,
+        ttl_seconds=None,
+        state_file=STATE_FILE,
+        poll_interval=POLL_INTERVAL_SECONDS
+    ):
+        self.ingest_fn = ingest_fn
+        self.watchlist_fn = watchlist_fn
+        self.ttl_seconds = dict(FRESHNESS_TTL_SECONDS, **(ttl_seconds or {}))
+        self.state_file = state_file
+        self.poll_interval = poll_interval
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._queued = set()
+        self._running = set()     # scheduled run + any refresh_now() callers
+        self._thread = None
+        self._stopping = False
+
+        # ticker -> {"last_ingest": ts, "asset_type": str, "last_status": str}
+        self._state = self._load_state()
+
+    # ---------- persistence ----------
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_state(self):
+        try:
+            with open(self.state_file, "w") as f:
+                json.dump(self._state, f)
+        except Exception as e:
+            print(f"⚠️ Could not save refresh state: {e}")
+
+    # ---------- freshness ----------
+    def _ttl_for(self, ticker):
+        asset_type = self._state.get(ticker, {}).get("asset_type")
+        return self.ttl_seconds.get(asset_type, DEFAULT_TTL_SECONDS)
+
+    def next_run_at(self, ticker):
+        last = self._state.get(ticker, {}).get("last_ingest")
+        if last is None:
+            return time.time()
+        return last + self._ttl_for(ticker)
+
+    def is_fresh(self, ticker, now=None):
+        if self._state.get(ticker, {}).get("last_ingest") is None:
+            return False
+        return (now or time.time()) < self.next_run_at(ticker)
+
+    # ---------- triggers ----------
+    def request_refresh(self, tickers, force=False):
+        """
+        Queues the given tickers unless they are fresh, queued or running.
+        Returns the tickers that were actually queued.
+        """
+        queued = []
+        now = time.time()
+        with self._cond:
+            for ticker in tickers:
+                ticker = ticker.upper()
+                if ticker in self._queued or ticker in self._running:
+                    continue
+                if not force and self.is_fresh(ticker, now):
+                    continue
+                self._queue.append(ticker)
+                self._queued.add(ticker)
+                queued.append(ticker)
+            if queued:
+                self._cond.notify()
+        if queued:
+            print(f"🗓️ Refresh queued for {queued}")
+        return queued
+
+    def forget(self, ticker):
+        """
+        Drops a ticker removed from the watchlist. If it is being ingested
+        right now, waits for that run to finish, so data deleted after
+        forget() returns can't be re-added by it.
+        """
+        ticker = ticker.upper()
+        with self._cond:
+            if ticker in self._queued:
+                self._queued.discard(ticker)
+                self._queue.remove(ticker)
+            while ticker in self._running:
+                self._cond.wait()
+            self._state.pop(ticker, None)
+            self._save_state()
+
+    def refresh_now(self, ticker):
+        """
+        Ingests ticker in the calling thread (e.g. an explicit API request)
+        with the same bookkeeping as a scheduled run. If the ticker is
+        already being ingested, waits for that run instead of starting a
+        second one. Raises whatever the ingest raised.
+        """
+        ticker = ticker.upper()
+        with self._cond:
+            if ticker in self._running:
+                while ticker in self._running:
+                    self._cond.wait()
+                return
+            if ticker in self._queued:
+                self._queued.discard(ticker)
+                self._queue.remove(ticker)
+            self._running.add(ticker)
+
+        error = self._refresh(ticker)
+        if error is not None:
+            raise error
+
+    # ---------- worker ----------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._queue and not self._stopping:
+                    self._cond.wait(timeout=self.poll_interval)
+                if self._stopping:
+                    return
+                ticker = self._queue.popleft() if self._queue else None
+                if ticker:
+                    self._queued.discard(ticker)
+                    self._running.add(ticker)
+
+            if ticker is None:
+                # Poll timeout: refresh anything on the watchlist that went stale
+                if self.watchlist_fn:
+                    try:
+                        self.request_refresh(self.watchlist_fn())
+                    except Exception as e:
+                        print(f"⚠️ Scheduler watchlist poll failed: {e}")
+                continue
+
+            self._refresh(ticker)
+
+    def _refresh(self, ticker):
+        """Runs one ingest of a ticker marked running. Returns the error, if any."""
+        status = "ok"
+        error = None
+        asset_type = self._state.get(ticker, {}).get("asset_type")
+        try:
+            if asset_type is None:
+                asset_type = resolve_asset(ticker)["asset_type"]
+            self.ingest_fn(ticker)
+        except Exception as e:
+            print(f"⚠️ Failed to ingest {ticker}: {e}")
+            status = "error"
+            error = e
+
+        with self._cond:
+            self._running.discard(ticker)
+            # Failed runs also count as an attempt so a broken source isn't
+            # hammered on every dashboard load; it is retried after the TTL.
+            self._state[ticker] = {
+                "last_ingest": time.time(),
+                "asset_type": asset_type,
+                "last_status": status
+            }
+            self._save_state()
+            self._cond.notify_all()
+        return error
+
+    # ---------- introspection ----------
+    def schedule(self, tickers=None):
+        """Per-ticker last ingest, next run time and current state."""
+        with self._cond:
+            names = list(tickers) if tickers is not None else sorted(self._state)
+            now = time.time()
+            rows = []
+            for ticker in names:
+                ticker = ticker.upper()
+                entry = self._state.get(ticker, {})
+                if ticker in self._running:
+                    state = "running"
+                elif ticker in self._queued:
+                    state = "queued"
+                elif self.is_fresh(ticker, now):
+                    state = "fresh"
+                else:
+                    state = "stale"
+                rows.append({
+                    "ticker": ticker,
+                    "asset_type": entry.get("asset_type"),
+                    "last_ingest": entry.get("last_ingest"),
+                    "last_status": entry.get("last_status"),
+                    "ttl_seconds": self._ttl_for(ticker),
+                    "next_run": self.next_run_at(ticker),
+                    "state": state
+                })
+            return {
+                "queue_depth": len(self._queue),
+                "running": sorted(self._running),
+                "poll_interval_seconds": self.poll_interval,
+                "tickers": rows
+            }
@@ -0,0 +1,214 @@
+"""
+Retention / compaction for stock_news_db.
+
+Queries never look back further than a few days, so old documents only
+make the index bigger and timestamp-filtered searches slower. Each
+content_type keeps documents for its own window; older ones are deleted
+in batches (and pruned from the BM25 / fingerprint indexes), optionally
+after being appended to a gzip JSON-lines archive.
+
+    python retention.py            # apply policies, archive expired docs
+    python retention.py --dry-run  # only count what would be removed
+"""
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from vector_store import DB_PATH, delete_documents, drop_partitions_before, get_collection
+
+# ===============================
+# Policies
+# ===============================
+# Days to keep per content_type. Every window is longer than the default
+# query lookback (120h); a longer hours_lookback will not find expired docs.
+RETENTION_DAYS = {
+    "price": 7,
+    "macro": 14,
+    "news": 30,
+}
+DEFAULT_RETENTION_DAYS = 30      # content types without a policy
+RETENTION_BATCH_SIZE = 500
+ARCHIVE_DIR = "./archive"
+RETENTION_INTERVAL_SECONDS = 6 * 3600
+
+
+def retention_cutoff(content_type, now=None):
+    """Timestamp before which a doc of this content_type is expired."""
+    days = RETENTION_DAYS.get(content_type, DEFAULT_RETENTION_DAYS)
+    return (now if now is not None else time.time()) - days * 86400
+
+def is_expired(meta, now=None):
+    return float(meta.get("timestamp", 0) or 0) < retention_cutoff(meta.get("content_type"), now)
+
+def _dir_size_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _archive_path(archive_dir):
+    return os.path.join(archive_dir, f"news-{datetime.now():%Y%m%d}.jsonl.gz")
+
+def _expired_where(content_type, cutoff, policies):
+    if content_type is None:
+        # Everything not covered by an explicit policy
+        type_clause = {"content_type": {"$nin": list(policies)}}
+    else:
+        type_clause = {"content_type": content_type}
+    return {"$and": [type_clause, {"timestamp": {"$lt": cutoff}}]}
+
+def run_retention(policies=None, archive=True, dry_run=False, batch_size=RETENTION_BATCH_SIZE, archive_dir=ARCHIVE_DIR):
+    """
+    Applies the retention policies once. Returns a report with per-type
+    counts and document count / on-disk size before and after.
+    """
+    policies = dict(RETENTION_DAYS, **(policies or {}))
+    collection = get_collection()
+    started = time.perf_counter()
+
+    report = {
+        "dry_run": dry_run,
+        "policies_days": dict(policies, default=DEFAULT_RETENTION_DAYS),
+        "documents_before": collection.count(),
+        "bytes_before": _dir_size_bytes(DB_PATH),
+        "removed": {},
+        "archive": None
+    }
+
+    now = time.time()
+    archive_file = None
+    if archive and not dry_run:
+        os.makedirs(archive_dir, exist_ok=True)
+        report["archive"] = _archive_path(archive_dir)
+        # Append mode adds a new gzip member; readers see one continuous stream
+        archive_file = gzip.open(report["archive"], "at", encoding="utf-8")
+
+    def archive_page(page):
+        for doc_id, doc, meta in zip(page["ids"], page["documents"], page["metadatas"]):
+            archive_file.write(json.dumps({"id": doc_id, "document": doc, "metadata": meta}) + "\n")
+
+    try:
+        if not dry_run:
+            # Partitions older than every window go at once (partitioned layout only)
+            longest = max(list(policies.values()) + [DEFAULT_RETENTION_DAYS])
+            report["partitions_dropped"] = drop_partitions_before(
+                now - longest * 86400,
+                on_page=archive_page if archive_file else None
+            )
+
+        for content_type, days in list(policies.items()) + [(None, DEFAULT_RETENTION_DAYS)]:
+            where = _expired_where(content_type, now - days * 86400, policies)
+            label = content_type or "other"
+
+            if dry_run:
+                report["removed"][label] = len(collection.get(where=where, include=[])["ids"])
+                continue
+
+            removed = 0
+            attempted = set()
+            while True:
+                page = collection.get(
+                    where=where,
+                    limit=batch_size,
+                    include=["documents", "metadatas"] if archive_file else ["metadatas"]
+                )
+                # Ids a delete already went out for and that came back anyway
+                # (e.g. their partition was dropped meanwhile) are not retried
+                fresh = [i for i, doc_id in enumerate(page["ids"]) if doc_id not in attempted]
+                if not fresh:
+                    break
+                page = {key: [page[key][i] for i in fresh] for key in page if key in ("ids", "documents", "metadatas")}
+                attempted.update(page["ids"])
+
+                if archive_file:
+                    archive_page(page)
+
+                symbols = {m.get("symbol", m.get("ticker")) for m in page["metadatas"]}
+                removed += delete_documents(page["ids"], symbols=symbols, batch_size=batch_size)
+
+            report["removed"][label] = removed
+    finally:
+        if archive_file:
+            archive_file.close()
+
+    report["documents_after"] = collection.count()
+    report["bytes_after"] = _dir_size_bytes(DB_PATH)
+    report["seconds"] = round(time.perf_counter() - started, 3)
+
+    total = sum(report["removed"].values()) + report.get("partitions_dropped", 0)
+    verb = "would remove" if dry_run else "removed"
+    print(
+        f"🧹 Retention {verb} {total} documents {report['removed']} "
+        f"({report['documents_before']} -> {report['documents_after']} docs, "
+        f"{report['bytes_before'] / 1e6:.1f} -> {report['bytes_after'] / 1e6:.1f} MB)"
+    )
+    return report
+
+# ===============================
+# Schedule
+# ===============================
+class RetentionJob:
+    """Runs run_retention every `interval` seconds on a background thread."""
+
+    def __init__(self, interval=RETENTION_INTERVAL_SECONDS, archive=True):
+        self.interval = interval
+        self.archive = archive
+        self.last_report = None
+        self.last_error = None
+        self._lock = threading.Lock()     # one run at a time (schedule or admin)
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run_now(self, dry_run=False, archive=None):
+        with self._lock:
+            try:
+                report = run_retention(
+                    archive=self.archive if archive is None else archive,
+                    dry_run=dry_run
+                )
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            if not dry_run:
+                self.last_report = report
+            return report
+
+    def _loop(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.run_now()
+            except Exception as e:
+                print(f"⚠️ Retention run failed: {e}")
+
+    def status(self):
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "interval_seconds": self.interval,
+            "policies_days": dict(RETENTION_DAYS, default=DEFAULT_RETENTION_DAYS),
+            "last_report": self.last_report,
+            "last_error": self.last_error
+        }
+
+
+if __name__ == "__main__":
+    run_retention(dry_run="--dry-run" in sys.argv[1:])
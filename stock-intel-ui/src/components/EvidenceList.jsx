@@ -16,16 +16,17 @@ export default function EvidenceList({ items }) {
                         <span className="text-slate-500 mt-1 sm:mt-0.5">•</span>
                         <div className="flex-1">
                             <span className="text-slate-300 leading-relaxed block sm:inline">{item.summary} </span>
-                            {item.source_url && (
+                            {(item.source_urls?.length ? item.source_urls : [item.source_url]).filter(Boolean).map((url, i) => (
                                 <a
-                                    href={item.source_url}
+                                    key={url}
+                                    href={url}
                                     target="_blank"
                                     rel="noopener noreferrer"
                                     className="inline-flex items-center gap-1 text-emerald-500 hover:text-emerald-400 font-medium whitespace-nowrap opacity-80 hover:opacity-100 transition-opacity ml-1"
                                 >
-                                    Source <ExternalLink className="w-3 h-3" />
+                                    Source{i > 0 ? ` ${i + 1}` : ''} <ExternalLink className="w-3 h-3" />
                                 </a>
-                            )}
+                            ))}
                         </div>
                     </li>
                 ))}
@@ -0,0 +1,267 @@
+"""
+Symbol -> document id index for stock_news_db.
+
+Purging a ticker with a metadata-filtered delete scans the whole
+collection, and counting a ticker's documents means fetching them. This
+SQLite table maps every stored doc id to its symbol and content_type; it
+is updated wherever documents are upserted (ingest_all, the LLM backfill)
+or deleted (vector_store.delete_documents), drives chunked id deletes and
+answers per-ticker counts without touching Chroma.
+
+    python symbol_index.py            # check against the store, rebuild if out of sync
+    python symbol_index.py --rebuild  # rebuild unconditionally
+"""
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+SYMBOL_INDEX_PATH = "./stock_news_symbols.sqlite3"
+REBUILD_ATTEMPTS = 3
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        doc_id TEXT PRIMARY KEY,
+        symbol TEXT NOT NULL,
+        content_type TEXT
+    )
+"""
+
+
+class SymbolIndex:
+    def __init__(self, path=None):
+        self.path = path or SYMBOL_INDEX_PATH
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()   # one rebuild at a time
+        self._removed_during_rebuild = None     # set of ids while a rebuild pass runs
+        with self._connect() as conn:
+            conn.execute(_CREATE_TABLE.format(name="doc_symbols"))
+            conn.execute("CREATE INDEX IF NOT EXISTS doc_symbols_symbol ON doc_symbols (symbol)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _rows(ids, metadatas):
+        for doc_id, meta in zip(ids, metadatas):
+            meta = meta or {}
+            yield doc_id, meta.get("symbol", meta.get("ticker")) or "", meta.get("content_type")
+
+    def add_documents(self, ids, metadatas):
+        """Records (or re-records) docs; same arguments as collection.upsert."""
+        rows = list(self._rows(ids, metadatas))
+        if not rows:
+            return
+        with self._lock, self._connect() as conn:
+            tables = ["doc_symbols"] if self._removed_during_rebuild is None else ["doc_symbols", "doc_symbols_rebuild"]
+            for table in tables:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} (doc_id, symbol, content_type) VALUES (?, ?, ?)",
+                    rows
+                )
+
+    def remove(self, ids):
+        ids = list(ids)
+        removed = 0
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                removed += conn.execute(f"DELETE FROM doc_symbols WHERE doc_id IN ({placeholders})", chunk).rowcount
+                if self._removed_during_rebuild is not None:
+                    conn.execute(f"DELETE FROM doc_symbols_rebuild WHERE doc_id IN ({placeholders})", chunk)
+            if self._removed_during_rebuild is not None:
+                self._removed_during_rebuild.update(ids)
+        return removed
+
+    def is_verified(self):
+        """
+        True once the index has been rebuilt from, or checked against, the
+        store. Before that (e.g. a store that predates the index) it may
+        only hold docs ingested since the upgrade.
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'verified'").fetchone()
+        return row is not None
+
+    def _set_verified(self, verified=True):
+        with self._lock, self._connect() as conn:
+            if verified:
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('verified', '1')")
+            else:
+                conn.execute("DELETE FROM meta WHERE name = 'verified'")
+
+    def ids_for(self, symbol):
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT doc_id FROM doc_symbols WHERE symbol = ?", (symbol,)).fetchall()
+        return [doc_id for (doc_id,) in rows]
+
+    def counts(self, symbols=None):
+        """{symbol: {"total": n, <content_type>: n, ...}}, optionally only for the given symbols."""
+        query = "SELECT symbol, content_type, COUNT(*) FROM doc_symbols"
+        args = []
+        if symbols is not None:
+            symbols = list(symbols)
+            if not symbols:
+                return {}
+            query += f" WHERE symbol IN ({','.join('?' * len(symbols))})"
+            args = symbols
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(query + " GROUP BY symbol, content_type", args).fetchall()
+
+        counts = {}
+        for symbol, content_type, count in rows:
+            entry = counts.setdefault(symbol, {"total": 0})
+            entry["total"] += count
+            entry[content_type or "unknown"] = count
+        return counts
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            documents, symbols = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT symbol) FROM doc_symbols"
+            ).fetchone()
+        return {"documents": documents, "symbols": symbols, "path": self.path}
+
+    # ---------- consistency ----------
+    def _store_rows(self, collection, batch_size):
+        offset = 0
+        while True:
+            page = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                break
+            yield from self._rows(page["ids"], page["metadatas"])
+            offset += len(page["ids"])
+
+    def _add_rebuilt_rows(self, rows):
+        with self._lock, self._connect() as conn:
+            # A page read just before a delete must not resurrect the id
+            rows = [row for row in rows if row[0] not in self._removed_during_rebuild]
+            conn.executemany(
+                "INSERT OR IGNORE INTO doc_symbols_rebuild (doc_id, symbol, content_type) VALUES (?, ?, ?)",
+                rows
+            )
+
+    def _rebuild_pass(self, collection, batch_size):
+        """
+        Records the store into a side table while writers keep going (their
+        adds/removes land in both tables), then swaps it in. Returns
+        (documents read, whether deletes ran during the pass).
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute("DROP TABLE IF EXISTS doc_symbols_rebuild")
+            conn.execute(_CREATE_TABLE.format(name="doc_symbols_rebuild"))
+            self._removed_during_rebuild = set()
+
+        count = 0
+        rows = []
+        try:
+            for row in self._store_rows(collection, batch_size):
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    self._add_rebuilt_rows(rows)
+                    count += len(rows)
+                    rows = []
+            self._add_rebuilt_rows(rows)
+            count += len(rows)
+        except Exception:
+            with self._lock:
+                self._removed_during_rebuild = None
+            raise
+
+        with self._lock, self._connect() as conn:
+            disturbed = bool(self._removed_during_rebuild)
+            self._removed_during_rebuild = None
+            conn.execute("DROP TABLE doc_symbols")
+            conn.execute("ALTER TABLE doc_symbols_rebuild RENAME TO doc_symbols")
+            conn.execute("CREATE INDEX IF NOT EXISTS doc_symbols_symbol ON doc_symbols (symbol)")
+        return count, disturbed
+
+    def rebuild(self, collection, batch_size=500, attempts=REBUILD_ATTEMPTS):
+        """
+        Re-records every document in the collection. Deletes during a pass
+        shift the offsets it pages by and can skip docs, so such a pass is
+        repeated; the index is only marked verified after a clean one.
+        """
+        with self._rebuild_lock:
+            for _ in range(attempts):
+                count, disturbed = self._rebuild_pass(collection, batch_size)
+                if not disturbed:
+                    self._set_verified()
+                    return count
+            self._set_verified(False)
+            print("⚠️ Symbol index rebuilt while documents were being deleted; left unverified")
+            return count
+
+    def check(self, collection, repair=False, batch_size=500):
+        """
+        Compares the index with the store. Returns counts of ids missing
+        from the index, stale ids (no longer stored) and symbol mismatches;
+        repair=True rebuilds when any are found.
+        """
+        with self._lock, self._connect() as conn:
+            indexed = {
+                doc_id: (symbol, content_type)
+                for doc_id, symbol, content_type in conn.execute("SELECT doc_id, symbol, content_type FROM doc_symbols")
+            }
+
+        missing = mismatched = stored = 0
+        for doc_id, symbol, content_type in self._store_rows(collection, batch_size):
+            stored += 1
+            entry = indexed.pop(doc_id, None)
+            if entry is None:
+                missing += 1
+            elif entry != (symbol, content_type):
+                mismatched += 1
+
+        report = {
+            "stored": stored,
+            "missing": missing,
+            "stale": len(indexed),
+            "mismatched": mismatched,
+            "consistent": not (missing or indexed or mismatched),
+            "rebuilt": False
+        }
+        if report["consistent"]:
+            self._set_verified()
+        elif repair:
+            self.rebuild(collection, batch_size)
+            report["rebuilt"] = True
+        return report
+
+    def ensure_verified(self, collection):
+        """Checks (and repairs) the index once; later calls are free."""
+        if self.is_verified():
+            return None
+        report = self.check(collection, repair=True)
+        print(f"🗂️ Symbol index verified against the store: {report}")
+        return report
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_symbol_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SymbolIndex()
+    return _index
+
+
+if __name__ == "__main__":
+    from vector_store import get_collection
+    if "--rebuild" in sys.argv[1:]:
+        count = get_symbol_index().rebuild(get_collection())
+        print(f"✅ Symbol index rebuilt: {count} documents")
+    else:
+        report = get_symbol_index().check(get_collection(), repair=True)
+        print(f"✅ Symbol index check: {report}")
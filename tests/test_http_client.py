@@ -0,0 +1,141 @@
+"""
+Shared HTTP fetch layer tests against a local stand-in server.
+No external network access is needed.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from ingestion import http_client
+from ingestion import alphavantage_news, asset_registry, google_news, moneycontrol, seen_ledger
+
+RSS_BODY = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>stand-in</title>
+<item>
+  <title>ITC shares rise after strong quarterly results</title>
+  <link>https://example.com/itc-results</link>
+  <pubDate>Mon, 12 Oct 2026 09:30:00 GMT</pubDate>
+  <description>ITC reported a rise in net profit driven by cigarettes and FMCG, with margins expanding across segments.</description>
+</item>
+</channel></rss>"""
+
+AV_BODY = {
+    "feed": [
+        {
+            "title": "Apple unveils new chips",
+            "summary": "Apple announced new in-house chips for its laptops.",
+            "source": "Reuters",
+            "url": "https://example.com/apple-chips",
+            "time_published": "20261012T093000",
+            "ticker_sentiment": [
+                {
+                    "ticker": "AAPL",
+                    "relevance_score": "0.8",
+                    "ticker_sentiment_score": "0.3",
+                    "ticker_sentiment_label": "Bullish"
+                }
+            ]
+        }
+    ]
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+
+    def setup(self):
+        # One handler instance per TCP connection
+        type(self).connections += 1
+        super().setup()
+
+    def _send(self, body, content_type):
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.startswith("/query"):
+            self._send(json.dumps(AV_BODY), "application/json")
+        elif self.path.startswith("/rss"):
+            self._send(RSS_BODY, "application/rss+xml")
+        elif self.path.startswith("/slow"):
+            time.sleep(1.0)
+            self._send("{}", "application/json")
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StandInHandler.connections = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    http_client.reset_session()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    http_client.reset_session()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def ledger(monkeypatch, tmp_path):
+    # Fetchers drop known ids; keep the test ledger out of the working directory
+    monkeypatch.setattr(seen_ledger, "_ledger", seen_ledger.SeenLedger(str(tmp_path / "seen.sqlite3")))
+
+
+def test_connections_are_reused(server):
+    for _ in range(5):
+        assert http_client.fetch_json(f"{server}/query")["feed"]
+    assert StandInHandler.connections == 1
+
+
+def test_hung_host_times_out(server):
+    start = time.perf_counter()
+    with pytest.raises(requests.exceptions.RequestException):
+        http_client.fetch_json(f"{server}/slow", timeout=(1, 0.2))
+    # 1 attempt + 2 retries, each bounded by the read timeout
+    assert time.perf_counter() - start < 3
+
+
+def test_async_fetch_many_keeps_order(server):
+    urls = [f"{server}/query", f"{server}/missing", f"{server}/rss"]
+    results = asyncio.run(http_client.async_fetch_many(urls))
+    assert results[0]["feed"]
+    assert isinstance(results[1], requests.exceptions.HTTPError)
+    assert isinstance(results[2], ValueError)  # RSS is not JSON
+
+
+def test_alphavantage_fetcher_uses_shared_layer(server, ledger, monkeypatch, tmp_path):
+    monkeypatch.setattr(asset_registry, "REGISTRY_PATH", str(tmp_path / "assets.sqlite3"))
+    monkeypatch.setattr(asset_registry, "_initialized", False)
+    monkeypatch.setattr(alphavantage_news, "ALPHAVANTAGE_URL", f"{server}/query")
+    docs = alphavantage_news.fetch_alphavantage_news("AAPL", "demo")
+    assert len(docs) == 1
+    assert docs[0]["metadata"]["sentiment_label"] == "Bullish"
+
+
+def test_google_news_fetcher_parses_feed(server, ledger, monkeypatch):
+    monkeypatch.setattr(google_news, "GOOGLE_NEWS_RSS_URL", f"{server}/rss")
+    docs = google_news.fetch_google_news("ITC", "equity")
+    assert len(docs) == 1
+    assert docs[0]["metadata"]["source_url"] == "https://example.com/itc-results"
+
+
+def test_moneycontrol_fetcher_uses_google_news_endpoint(server, ledger, monkeypatch):
+    monkeypatch.setattr(google_news, "GOOGLE_NEWS_RSS_URL", f"{server}/rss")
+    docs = moneycontrol.fetch_moneycontrol_news("ITC")
+    assert len(docs) == 1
+    assert docs[0]["metadata"]["source"] == "MoneyControl"
@@ -0,0 +1,222 @@
+"""
+PartitionedCollection tests against an in-memory Chroma client.
+A hashed bag-of-words embedding stands in for the sentence-transformer
+model, so no model download is needed.
+"""
+import hashlib
+import uuid
+from datetime import datetime, timezone
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb.api.types import EmbeddingFunction
+
+from partitioned_collection import PartitionedCollection, _timestamp_bounds, migrate_to_partitions
+
+DIM = 32
+DAY = 86400
+# Monday 2026-10-12 00:00 UTC
+MONDAY = datetime(2026, 10, 12, tzinfo=timezone.utc).timestamp()
+
+
+class HashEmbedding(EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vector = np.zeros(DIM, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % DIM] += 1.0
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return vectors
+
+    @staticmethod
+    def name():
+        return "hash-test"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashEmbedding()
+
+
+DOCS = [
+    ("d1", "apple earnings beat estimates", MONDAY + 3600),
+    ("d2", "apple shares fall on guidance", MONDAY + DAY + 3600),
+    ("d3", "itc results strong cigarettes", MONDAY + 2 * DAY + 3600),
+    ("d4", "google cloud revenue grows", MONDAY + 7 * DAY + 3600),
+    ("d5", "apple launches new chips", MONDAY + 8 * DAY + 3600),
+    ("d6", "market rally lifts tech stocks", MONDAY + 14 * DAY + 3600),
+]
+
+
+def _meta(doc_id, timestamp):
+    return {"symbol": "AAPL" if doc_id in ("d1", "d2", "d5") else "OTHER", "timestamp": timestamp}
+
+
+@pytest.fixture
+def client():
+    return chromadb.EphemeralClient()
+
+
+@pytest.fixture
+def base_name():
+    # EphemeralClient instances share one in-memory system within a process
+    return f"news_{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def store(client, base_name):
+    collection = PartitionedCollection(client, base_name, HashEmbedding(), granularity="day")
+    collection.upsert(
+        ids=[d[0] for d in DOCS],
+        documents=[d[1] for d in DOCS],
+        metadatas=[_meta(d[0], d[2]) for d in DOCS]
+    )
+    return collection
+
+
+def test_timestamp_bounds():
+    assert _timestamp_bounds(None) == (None, None)
+    assert _timestamp_bounds({"symbol": "AAPL"}) == (None, None)
+    assert _timestamp_bounds({"timestamp": {"$gte": 10}}) == (10, None)
+    where = {"$and": [
+        {"symbol": "AAPL"},
+        {"timestamp": {"$gte": 10}},
+        {"timestamp": {"$gt": 20, "$lt": 50}},
+        {"timestamp": {"$lte": 40}},
+    ]}
+    assert _timestamp_bounds(where) == (20, 40)
+
+
+def test_upsert_routes_by_timestamp(client, base_name):
+    weekly = PartitionedCollection(client, base_name, HashEmbedding(), granularity="week")
+    weekly.upsert(
+        ids=[d[0] for d in DOCS],
+        documents=[d[1] for d in DOCS],
+        metadatas=[_meta(d[0], d[2]) for d in DOCS]
+    )
+    assert weekly.stats()["partitions"] == {
+        f"{base_name}_week_20261012": 3,
+        f"{base_name}_week_20261019": 2,
+        f"{base_name}_week_20261026": 1,
+    }
+    assert weekly.count() == len(DOCS)
+
+    # Partitions are found again by a fresh instance
+    reopened = PartitionedCollection(client, base_name, HashEmbedding(), granularity="week")
+    assert reopened.count() == len(DOCS)
+
+
+def test_get_pages_across_partitions(store):
+    everything = store.get(include=[])["ids"]
+    assert everything == [d[0] for d in DOCS]
+
+    for limit in (1, 2, 4):
+        paged = []
+        offset = 0
+        while True:
+            page = store.get(limit=limit, offset=offset, include=[])["ids"]
+            if not page:
+                break
+            assert len(page) <= limit
+            paged.extend(page)
+            offset += len(page)
+        assert paged == everything
+
+
+def test_get_offset_with_where(store):
+    where = {"symbol": "AAPL"}
+    assert store.get(where=where, include=[])["ids"] == ["d1", "d2", "d5"]
+    assert store.get(where=where, offset=1, limit=1, include=[])["ids"] == ["d2"]
+    assert store.get(where=where, offset=2, include=[])["ids"] == ["d5"]
+    assert store.get(where=where, offset=3, include=[])["ids"] == []
+
+
+def test_get_include(store):
+    page = store.get(ids=["d3"], include=["metadatas"])
+    assert page["ids"] == ["d3"]
+    assert page["metadatas"][0]["symbol"] == "OTHER"
+    assert page["documents"] is None
+
+
+def test_query_matches_single_collection(client, store, base_name):
+    single = client.create_collection(f"{base_name}_single", embedding_function=HashEmbedding())
+    single.upsert(
+        ids=[d[0] for d in DOCS],
+        documents=[d[1] for d in DOCS],
+        metadatas=[_meta(d[0], d[2]) for d in DOCS]
+    )
+    texts = ["apple chips", "tech stocks rally"]
+
+    merged = store.query(query_texts=texts, n_results=3)
+    expected = single.query(query_texts=texts, n_results=3, include=["distances"])
+    for q in range(len(texts)):
+        assert merged["distances"][q] == pytest.approx(expected["distances"][q], abs=1e-5)
+        assert sorted(merged["distances"][q]) == merged["distances"][q]
+        assert merged["documents"][q][0] == dict((d[0], d[1]) for d in DOCS)[merged["ids"][q][0]]
+
+
+def test_query_skips_partitions_outside_window(store):
+    where = {"timestamp": {"$gte": MONDAY + 7 * DAY}}
+    assert len(store._overlapping(where)) == 3
+
+    results = store.query(query_texts=["apple earnings"], n_results=10, where=where)
+    assert set(results["ids"][0]) == {"d4", "d5", "d6"}
+
+
+def test_update_and_delete_by_id(store):
+    store.update(
+        ids=["d5", "d1"],
+        metadatas=[_meta("d5", DOCS[4][2]) | {"flag": 5}, _meta("d1", DOCS[0][2]) | {"flag": 1}]
+    )
+    page = store.get(ids=["d1", "d5"], include=["metadatas"])
+    assert {doc_id: m["flag"] for doc_id, m in zip(page["ids"], page["metadatas"])} == {"d1": 1, "d5": 5}
+
+    store.delete(ids=["d2", "d4", "missing"])
+    assert store.get(include=[])["ids"] == ["d1", "d3", "d5", "d6"]
+
+    store.delete(where={"symbol": "AAPL"})
+    assert store.get(include=[])["ids"] == ["d3", "d6"]
+
+
+def test_drop_partitions_before(store, base_name):
+    expired = store.partitions_before(MONDAY + 2 * DAY)
+    assert expired == [f"{base_name}_day_20261012", f"{base_name}_day_20261013"]
+
+    for name in expired:
+        store.drop_partition(name)
+    assert store.get(include=[])["ids"] == ["d3", "d4", "d5", "d6"]
+    assert store.partitions_before(MONDAY + 2 * DAY) == []
+
+
+def test_reads_survive_concurrently_dropped_partition(client, store, base_name):
+    # A reader that took its partition snapshot before the drop
+    snapshot = store._overlapping()
+    store._overlapping = lambda where=None: snapshot
+    client.delete_collection(f"{base_name}_day_20261012")
+
+    assert store.get(ids=["d1", "d2"], include=[])["ids"] == ["d2"]
+    assert store.get(include=[])["ids"] == ["d2", "d3", "d4", "d5", "d6"]
+    assert "d1" not in store.query(query_texts=["apple earnings"], n_results=10)["ids"][0]
+    store.update(ids=["d2"], metadatas=[_meta("d2", DOCS[1][2])])
+    store.delete(ids=["d1"])
+
+
+def test_migrate_to_partitions(client, base_name):
+    source = client.create_collection(f"{base_name}_flat", embedding_function=HashEmbedding())
+    source.upsert(
+        ids=[d[0] for d in DOCS],
+        documents=[d[1] for d in DOCS],
+        metadatas=[_meta(d[0], d[2]) for d in DOCS]
+    )
+    target = PartitionedCollection(client, base_name, HashEmbedding(), granularity="week")
+
+    assert migrate_to_partitions(source, target, batch_size=4) == len(DOCS)
+    assert sorted(target.get(include=[])["ids"]) == sorted(d[0] for d in DOCS)
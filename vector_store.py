@@ -1,31 +1,243 @@
+import os
+import sys
+import threading
+import time
+
 import chromadb
 from chromadb.utils import embedding_functions
 
+from answer_cache import bump_corpus_version
+from bm25_index import get_bm25_index
+from near_duplicates import get_fingerprint_index
+from partitioned_collection import PartitionedCollection
+from symbol_index import get_symbol_index
+from ingestion.seen_ledger import get_seen_ledger
+from embedding_cache import CachedEmbeddingFunction, EMBEDDING_CACHE_MAX_MB
+
 DB_PATH = "./stock_news_db"
 COLLECTION_NAME = "financial_news"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Optional memory-mapped disk tier for the embedding cache, e.g. "./embedding_cache"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+# Optional time-partitioned layout: "day" or "week" (see partitioned_collection.py)
+PARTITION_GRANULARITY = os.getenv("VECTOR_STORE_PARTITIONS")
+
+# ===============================
+# Process-wide store runtime
+# ===============================
+def _current_rss_mb():
+    """Best-effort resident memory of this process in MB (None if unknown)."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        # Linux without psutil: second field is resident pages
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _peak_rss_mb():
+    """Peak resident memory of this process in MB (None if unknown)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class VectorStoreRuntime:
+    """
+    Owns the Chroma client, the embedding model and the collection handle.
+    Everything is loaded lazily on first use and then shared by the API,
+    ingestion and backfill paths for the lifetime of the process.
+    """
+
+    def __init__(self, db_path=DB_PATH, collection_name=COLLECTION_NAME, model_name=EMBEDDING_MODEL,
+                 partition_granularity=PARTITION_GRANULARITY):
+        self.db_path = db_path
+        self.collection_name = collection_name
+        self.model_name = model_name
+        self.partition_granularity = partition_granularity
+
+        self._lock = threading.Lock()
+        self._client = None
+        self._embedding_fn = None
+        self._collection = None
+        self._stats = {
+            "loaded": False,
+            "client_open_seconds": None,
+            "model_load_seconds": None,
+            "collection_open_seconds": None,
+            "rss_mb_before_load": None,
+            "rss_mb_after_load": None,
+            "collection_requests": 0,
+        }
+
+    def _load(self):
+        self._stats["rss_mb_before_load"] = _current_rss_mb()
+
+        start = time.perf_counter()
+        self._client = chromadb.PersistentClient(path=self.db_path)
+        self._stats["client_open_seconds"] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        # Content-hash cache in front of the model: repeated headlines and
+        # repeated questions skip the transformer forward pass.
+        self._embedding_fn = CachedEmbeddingFunction(
+            embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name=self.model_name
+            ),
+            model_name=self.model_name,
+            max_mb=EMBEDDING_CACHE_MAX_MB,
+            disk_path=EMBEDDING_CACHE_PATH
+        )
+        self._stats["model_load_seconds"] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        if self.partition_granularity:
+            self._collection = PartitionedCollection(
+                self._client,
+                self.collection_name,
+                self._embedding_fn,
+                granularity=self.partition_granularity
+            )
+        else:
+            self._collection = self._client.get_or_create_collection(
+                name=self.collection_name,
+                embedding_function=self._embedding_fn
+            )
+        self._stats["collection_open_seconds"] = round(time.perf_counter() - start, 3)
+
+        self._stats["rss_mb_after_load"] = _current_rss_mb()
+        self._stats["loaded"] = True
+        print(
+            f"🧠 Vector store ready: model {self._stats['model_load_seconds']}s, "
+            f"client {self._stats['client_open_seconds']}s"
+        )
+
+    def _ensure_loaded(self):
+        # Double-checked locking: only the first caller pays the load cost,
+        # concurrent first requests wait for it instead of loading twice.
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    self._load()
+
+    @property
+    def client(self):
+        self._ensure_loaded()
+        return self._client
+
+    @property
+    def embedding_function(self):
+        self._ensure_loaded()
+        return self._embedding_fn
+
+    def get_collection(self):
+        self._ensure_loaded()
+        self._stats["collection_requests"] += 1
+        return self._collection
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["rss_mb_now"] = _current_rss_mb()
+        stats["rss_mb_peak"] = _peak_rss_mb()
+        if self._embedding_fn is not None:
+            stats["embedding_cache"] = self._embedding_fn.stats()
+        if isinstance(self._collection, PartitionedCollection):
+            stats["partitions"] = self._collection.stats()
+        return stats
+
+
+_runtime = VectorStoreRuntime()
+
+def get_runtime():
+    return _runtime
 
 def get_collection():
-    client = chromadb.PersistentClient(path=DB_PATH)
+    return _runtime.get_collection()
+
+def get_store_stats():
+    """Load timings and memory use of the shared store runtime."""
+    return _runtime.stats()
 
-    embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
+DELETE_BATCH_SIZE = 500
 
-    collection = client.get_or_create_collection(
-        name=COLLECTION_NAME,
-        embedding_function=embedding_fn
-    )
+def delete_documents(ids, symbols=None, batch_size=DELETE_BATCH_SIZE, unmark=False):
+    """
+    Deletes documents by id in chunks and prunes every side index (BM25,
+    near-duplicate fingerprints, symbol index). symbols: tickers whose
+    cached answers should be invalidated. unmark=True also forgets the ids
+    in the seen ledger so fetchers pick the articles up again; only
+    explicit purges want that, retention must not (feeds keep serving old
+    articles, which would be re-ingested and expire again).
+    Returns the number of ids deleted.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    collection = get_collection()
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        collection.delete(ids=chunk)
+        _prune_side_indexes(chunk)
+        if unmark:
+            get_seen_ledger().unmark(chunk)
+    bump_corpus_version(symbols)
+    return len(ids)
 
-    return collection
+def _prune_side_indexes(ids):
+    get_bm25_index().remove(ids)
+    get_fingerprint_index().remove(ids)
+    get_symbol_index().remove(ids)
 
-def delete_news_for_ticker(ticker):
-    """Deletes all news articles for a given ticker from the DB."""
+def drop_partitions_before(cutoff, on_page=None, batch_size=DELETE_BATCH_SIZE):
+    """
+    Drops every time partition entirely older than cutoff (partitioned
+    layout only) and prunes the side indexes. on_page(page) sees each
+    page of documents/metadatas before it goes, e.g. for archiving.
+    Returns the number of documents dropped.
+    """
     collection = get_collection()
+    if not isinstance(collection, PartitionedCollection):
+        return 0
+
+    dropped = 0
+    for name in collection.partitions_before(cutoff):
+        partition = collection.partition(name)
+        symbols = set()
+        offset = 0
+        while True:
+            page = partition.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                break
+            if on_page:
+                on_page(page)
+            _prune_side_indexes(page["ids"])
+            symbols |= {m.get("symbol", m.get("ticker")) for m in page["metadatas"]}
+            offset += len(page["ids"])
+        collection.drop_partition(name)
+        bump_corpus_version(symbols)
+        print(f"🗂️ Dropped partition {name} ({offset} documents)")
+        dropped += offset
+    return dropped
+
+def delete_news_for_ticker(ticker):
+    """Deletes every document stored for a given ticker from the DB."""
     print(f"🗑️ Deleting news for {ticker}...")
     try:
-        collection.delete(
-            where={"ticker": ticker}
-        )
-        print(f"✅ Deleted news for {ticker}")
+        index = get_symbol_index()
+        ids = index.ids_for(ticker)
+        if not index.is_verified():
+            # Store predates the index: it may only know docs ingested since
+            ids = list(set(ids) | set(get_collection().get(where={"symbol": ticker}, include=[])["ids"]))
+        deleted = delete_documents(ids, symbols=[ticker], unmark=True)
+        print(f"✅ Deleted {deleted} documents for {ticker}")
     except Exception as e:
         print(f"❌ Error deleting news for {ticker}: {e}")
@@ -0,0 +1,47 @@
+import json
+import os
+import threading
+
+# -----------------------
+# Persistent Watchlist
+# -----------------------
+WATCHLIST_FILE = "watchlist.json"
+DEFAULT_WATCHLIST = ["ITC", "AAPL", "GOOGL","RELIANCE"]
+
+_cached = None
+_cache_lock = threading.Lock()
+
+def _read_file():
+    if not os.path.exists(WATCHLIST_FILE):
+        return None
+    try:
+        with open(WATCHLIST_FILE, "r") as f:
+            return json.load(f)
+    except:
+        return DEFAULT_WATCHLIST
+
+def load_watchlist():
+    watchlist = _read_file()
+    if watchlist is None:
+        save_watchlist(DEFAULT_WATCHLIST)
+        return DEFAULT_WATCHLIST
+    return watchlist
+
+def read_watchlist():
+    """
+    Read-only, in-memory view of the watchlist for the query path: never
+    creates the file and reads it once; save_watchlist keeps it current.
+    """
+    global _cached
+    if _cached is None:
+        with _cache_lock:
+            if _cached is None:
+                _cached = tuple(_read_file() or DEFAULT_WATCHLIST)
+    return list(_cached)
+
+def save_watchlist(watchlist):
+    global _cached
+    with _cache_lock:
+        with open(WATCHLIST_FILE, "w") as f:
+            json.dump(watchlist, f)
+        _cached = tuple(watchlist)